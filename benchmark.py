@@ -0,0 +1,245 @@
+import os
+import sys
+import json
+import time
+import fitz
+import tracemalloc
+from io import BytesIO
+from datetime import datetime
+from collections import OrderedDict
+from page_artifact import PageArtifact
+from table_extractor import TableExtractor
+from item_standardizer import ItemStandardizer
+from statement_generator import StatementGenerator
+
+class Benchmark:
+
+    def __init__(self, repeats=9):
+
+        self.repeats = repeats
+        self.baseline_path = 'data/benchmark_baseline.json'
+        self.threshold, self.min_seconds = 2.0, 0.05
+        self.stages = ['GetWords', 'ScorePage', 'ExtractLines', 'ExtractTables', 'FilterTables', 'IdentifyHeader', 'CleanRows',
+                       'ExtractTitle', 'ParseDates', 'FormatTables']
+        self.cell_stages = ['FilterTables', 'IdentifyHeader', 'CleanRows']
+        self.workers, self.worker_pages = 4, [2, 4, 8, 16, 32]
+        self.cases = OrderedDict([('short_report', dict(pages=10, columns=2)),
+                                  ('multi_column', dict(pages=10, columns=3, languages=('en', 'fr'))),
+                                  ('overprinted', dict(pages=10, columns=2, overprint=True)),
+                                  ('no_separators', dict(pages=10, columns=2, separators=False)),
+                                  ('multilingual', dict(pages=20, columns=2, languages=('en', 'fr', 'nl', 'no'))),
+                                  ('long_pages', dict(pages=6, columns=3, rows=150, page_height=1900, narrative=0))])
+
+    def Median(self, values):
+
+        return sorted(values)[len(values) // 2]
+
+    def Calibrate(self):
+
+        timings = []
+        for idx in range(self.repeats):
+            start = time.perf_counter()
+            sorted(str(number * number) for number in range(200000))
+            timings.append(time.perf_counter() - start)
+
+        return self.Median(timings)
+
+    def Measure(self, timings, stage, function, *args):
+
+        start = time.perf_counter()
+        result = function(*args)
+        timings[stage] += time.perf_counter() - start
+
+        return result
+
+    def ParseDates(self, table_extractor, tables):
+
+        return [table_extractor.ParseHeaderDate(' '.join(key.split())) for table in tables for key in table.rows[0][1:]]
+
+    def TimeStages(self, table_extractor, document):
+
+        document = fitz.open(stream=document, filetype='pdf')
+        timings, cells_count = OrderedDict((stage, 0.0) for stage in self.stages), 0
+        for page in document:
+            words = self.Measure(timings, 'GetWords', page.get_text, 'words')
+            score = self.Measure(timings, 'ScorePage', table_extractor.ScorePage, page, words)
+            if table_extractor.page_threshold and score < table_extractor.page_threshold:
+                continue
+
+            lines = self.Measure(timings, 'ExtractLines', table_extractor.ExtractLines, page, words)
+            tables = self.Measure(timings, 'ExtractTables', table_extractor.ExtractTables, lines)
+            cells_count += sum(len(table.rows) * len(table.rows[0]) for table in tables)
+            tables = self.Measure(timings, 'FilterTables', table_extractor.FilterTables, tables)
+            tables = self.Measure(timings, 'IdentifyHeader', table_extractor.IdentifyHeader, tables)
+            tables = self.Measure(timings, 'CleanRows', table_extractor.CleanRows, tables)
+            tables = self.Measure(timings, 'ExtractTitle', table_extractor.ExtractTitle, lines, tables)
+            self.Measure(timings, 'ParseDates', self.ParseDates, table_extractor, tables)
+
+            start = time.perf_counter()
+            artifact = PageArtifact(page.parent, page.number, table_extractor.strip_images)
+            table_extractor.FormatTables(artifact, lines, tables)
+            timings['FormatTables'] += time.perf_counter() - start
+
+        return timings, cells_count
+
+    def TimeCase(self, idx, options):
+
+        document = StatementGenerator(seed=idx)(**options)
+        repeat_timings, totals, standardize_times, tables_count = [], [], [], 0
+        for repeat in range(self.repeats):
+            table_extractor, item_standardizer = TableExtractor(), ItemStandardizer()
+            timings, cells_count = self.TimeStages(table_extractor, document)
+
+            start = time.perf_counter()
+            tables = table_extractor(BytesIO(document))
+            total = time.perf_counter() - start
+
+            start = time.perf_counter()
+            item_standardizer(tables)
+            standardize = time.perf_counter() - start
+
+            tables_count, items_count = len(tables), max([len(table['body'][0]) - 4 for table in tables] or [0])
+            repeat_timings.append(timings)
+            totals.append(total)
+            standardize_times.append(standardize)
+
+        timings = OrderedDict((stage, self.Median([timings[stage] for timings in repeat_timings])) for stage in self.stages)
+        timings['end_to_end'] = self.Median(totals)
+        timings['standardize_items'] = self.Median(standardize_times)
+        return timings, tables_count, cells_count, items_count
+
+    def TimeWorkers(self):
+
+        results, cpu_count = OrderedDict(), os.cpu_count() or 1
+        for pages in self.worker_pages:
+            document, table_extractor = StatementGenerator(seed=0)(pages=pages, columns=2), TableExtractor()
+            serial, parallel = None, None
+            for repeat in range(self.repeats):
+                start = time.perf_counter()
+                pdf_document = fitz.open(stream=document, filetype='pdf')
+                document_key = table_extractor.GetDocumentKey(document)
+                [table_extractor.ExtractPageTables(page, document_key) for page in pdf_document]
+                seconds = time.perf_counter() - start
+                serial = seconds if serial is None else min(serial, seconds)
+
+                start = time.perf_counter()
+                table_extractor.ExtractTablesParallel(document, pages, self.workers)
+                seconds = time.perf_counter() - start
+                parallel = seconds if parallel is None else min(parallel, seconds)
+
+            overhead = max(parallel - serial / min(self.workers, cpu_count), 0.0)
+            break_even = overhead / (serial / pages * (1 - 1 / self.workers))
+            results[str(pages)] = OrderedDict(serial=serial, parallel=parallel, speedup=serial / parallel, overhead=overhead,
+                                              break_even_pages=break_even)
+
+        return results
+
+    def MeasureMemory(self, document):
+
+        table_extractor = TableExtractor()
+        tracemalloc.start()
+        table_extractor(BytesIO(document))
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        pdf_document = fitz.open(stream=document, filetype='pdf')
+        pages_words = [page.get_text('words') for page in pdf_document]
+        tracemalloc.start()
+        snapshot = tracemalloc.take_snapshot()
+        lines = [table_extractor.ExtractLines(page, words) for page, words in zip(pdf_document, pages_words)]
+        statistics = tracemalloc.take_snapshot().compare_to(snapshot, 'filename')
+        tracemalloc.stop()
+        del lines
+
+        lines_memory = sum(statistic.size_diff for statistic in statistics)
+        lines_blocks = sum(statistic.count_diff for statistic in statistics)
+
+        return OrderedDict(peak_memory=peak_memory, lines_memory=lines_memory, lines_blocks=lines_blocks)
+
+    def LoadBaseline(self):
+
+        if not os.path.exists(self.baseline_path):
+            return None
+
+        with open(self.baseline_path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+
+    def SaveBaseline(self, results):
+
+        with open(self.baseline_path, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+
+    def Compare(self, results, baseline):
+
+        regressions = []
+        for case, case_results in results['cases'].items():
+            baseline_results = baseline['cases'].get(case)
+            if baseline_results is None:
+                continue
+
+            for metric, seconds in case_results['seconds'].items():
+                baseline_seconds = baseline_results['seconds'].get(metric)
+                if baseline_seconds is None or baseline_seconds < self.min_seconds:
+                    continue
+
+                ratio = case_results['normalized'][metric] / baseline_results['normalized'][metric]
+                if ratio > self.threshold:
+                    regressions.append((case, metric, ratio))
+
+            for metric, value in case_results.get('memory', {}).items():
+                baseline_value = baseline_results.get('memory', {}).get(metric)
+                if baseline_value and value / baseline_value > self.threshold:
+                    regressions.append((case, metric, value / baseline_value))
+
+        return regressions
+
+    def Run(self, update=False):
+
+        results = OrderedDict(date=datetime.now().strftime('%Y-%m-%d %H:%M:%S'), cases=OrderedDict())
+        for idx, (case, options) in enumerate(self.cases.items()):
+            calibration = self.Calibrate()
+            timings, tables_count, cells_count, items_count = self.TimeCase(idx, options)
+            memory = self.MeasureMemory(StatementGenerator(seed=idx)(**options))
+            normalized = OrderedDict((metric, seconds / calibration) for metric, seconds in timings.items())
+            pages_per_second = options['pages'] / timings['end_to_end']
+            cells_per_second = cells_count / max(sum(timings[stage] for stage in self.cell_stages), 1e-9)
+            results['cases'][case] = OrderedDict(pages=options['pages'], tables=tables_count, pages_per_second=pages_per_second,
+                                                 cells=cells_count, cells_per_second=cells_per_second, items=items_count,
+                                                 calibration=calibration,
+                                                 seconds=timings, normalized=normalized, memory=memory)
+
+            stages = ', '.join('%s %.1fms' % (stage, seconds * 1000) for stage, seconds in timings.items() if stage in self.stages)
+            print('%s: %d tables, %.1f pages/s, end to end %.1fms (%s)' % (case, tables_count, pages_per_second,
+                                                                           timings['end_to_end'] * 1000, stages))
+            print('%s: peak memory %.0fKiB, lines %.0fKiB in %d blocks' % (case, memory['peak_memory'] / 1024,
+                                                                          memory['lines_memory'] / 1024, memory['lines_blocks']))
+            print('%s: %d cells, %.0f cells/s through %s' % (case, cells_count, cells_per_second, ', '.join(self.cell_stages)))
+            print('%s: standardized items in %.1fms, longest table %d line items' % (case, timings['standardize_items'] * 1000,
+                                                                                     items_count))
+
+        workers = self.TimeWorkers()
+        results['workers'] = OrderedDict(workers=self.workers, cpu_count=os.cpu_count() or 1, pages=workers)
+        for pages, timings in workers.items():
+            print('%s pages: serial %.1fms, %d workers %.1fms, %.2fx speedup, pool overhead %.1fms' \
+                  % (pages, timings['serial'] * 1000, self.workers, timings['parallel'] * 1000, timings['speedup'],
+                     timings['overhead'] * 1000))
+
+        break_even = self.Median([timings['break_even_pages'] for timings in workers.values()])
+        print('%d workers break even from %.1f pages on %d cores, min_parallel_pages is %d' \
+              % (self.workers, break_even, self.workers, TableExtractor().min_parallel_pages))
+
+        baseline = self.LoadBaseline()
+        regressions = self.Compare(results, baseline) if baseline is not None else []
+        for case, metric, ratio in regressions:
+            print('Regression in %s: %s is %.2fx higher than baseline' % (case, metric, ratio))
+
+        if update or baseline is None:
+            self.SaveBaseline(results)
+            print('Baseline saved to %s' % self.baseline_path)
+
+        return regressions
+
+if __name__ == '__main__':
+    benchmark = Benchmark()
+    regressions = benchmark.Run(update='--update' in sys.argv)
+    sys.exit(1 if regressions else 0)
\ No newline at end of file
@@ -1,5 +1,7 @@
+import os
 import re
 import sys
+import json
 import time
 import psutil
 from contextlib import redirect_stdout, redirect_stderr
@@ -8,15 +10,17 @@ from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait, Select
 import selenium.webdriver.support.expected_conditions as EC
 from selenium.webdriver.common.by import By
-from selenium.common.exceptions import WebDriverException, TimeoutException
+from selenium.common.exceptions import WebDriverException, TimeoutException, SessionNotCreatedException
 from webdriver_manager.chrome import ChromeDriverManager
-from multi_processing import Mutex
+from multi_processing import Mutex, Value
 
 class Browser:
 
-    def __init__(self, headless=True):
+    def __init__(self, headless=True, max_memory=1.5 * 1024**3):
 
         self.headless = headless
+        self.max_memory = max_memory
+        self.crash_messages = ['crash', 'not reachable', 'invalid session id', 'disconnected']
         self.driver = self.CreateChromedriver(headless)
         self.window_handles = set()
         self.page_loads = 0
@@ -24,10 +28,27 @@ class Browser:
             import win32api
             win32api.SetConsoleCtrlHandler(lambda ctrl_type: Browser.CleanUp(), True)
 
+    def GetDriverPath(self, refresh=False):
+
+        driver_path = Value('chromedriver_path', None)
+        path = None if refresh else driver_path.Get()
+        if path is not None and os.path.isfile(path):
+            return path
+
+        with Mutex('chromedriver'):
+            path = driver_path.Get()
+            if refresh or path is None or not os.path.isfile(path):
+                with redirect_stdout(None), redirect_stderr(None):
+                    path = ChromeDriverManager().install()
+                driver_path.Set(path)
+
+        return path
+
     def CreateChromedriver(self, headless):
 
         options = Options()
         options.set_capability('unhandledPromptBehavior', 'dismiss')
+        options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
         options.add_experimental_option('useAutomationExtension', False)
         options.add_experimental_option('excludeSwitches', ['enable-logging', 'enable-automation'])
 
@@ -39,23 +60,58 @@ class Browser:
         if headless:
             options.add_argument('--headless')
 
-        with redirect_stdout(None), redirect_stderr(None), Mutex('browser'):
-            driver = webdriver.Chrome(ChromeDriverManager().install(), chrome_options=options)
-            driver.set_page_load_timeout(20)
+        start_time = time.time()
+        try:
+            with redirect_stdout(None), redirect_stderr(None):
+                driver = webdriver.Chrome(self.GetDriverPath(), chrome_options=options)
+        except SessionNotCreatedException:
+            with redirect_stdout(None), redirect_stderr(None):
+                driver = webdriver.Chrome(self.GetDriverPath(refresh=True), chrome_options=options)
+
+        driver.set_page_load_timeout(20)
+        print('Browser started in %.1f seconds' % (time.time() - start_time))
 
         return driver
 
-    def Restart(self):
+    def Restart(self, reason=None):
+
+        print('Restarting browser after %d page loads (%s)' % (self.page_loads, reason or 'requested'))
+        try:
+            self.driver.quit()
+        except WebDriverException:
+            pass
 
-        self.driver.quit()
         while 1:
             try:
                 self.driver = self.CreateChromedriver(self.headless)
                 self.window_handles = set()
+                self.page_loads = 0
                 break
             except WebDriverException:
                 continue
 
+    def GetMemoryUsage(self):
+
+        try:
+            process = psutil.Process(self.driver.service.process.pid)
+            processes = [process] + process.children(recursive=True)
+        except (AttributeError, psutil.NoSuchProcess):
+            return 0
+
+        memory_usage = 0
+        for process in processes:
+            try:
+                memory_usage += process.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+
+        return memory_usage
+
+    def IsCrashed(self, exception):
+
+        message = str(exception).lower()
+        return any(crash_message in message for crash_message in self.crash_messages)
+
     def ApplyEvasions(self):
 
         window_handle = self.driver.current_window_handle
@@ -108,16 +164,27 @@ class Browser:
 
     def LoadPage(self, url, timeout=20, retries=3):
 
-        if self.page_loads >= 300:
-            self.Restart()
-            self.page_loads = 0
+        memory_usage = self.GetMemoryUsage()
+        if memory_usage > self.max_memory:
+            self.Restart('memory usage %.0f MB' % (memory_usage / 1024**2))
+
+        try:
+            self.ApplyEvasions()
+        except WebDriverException as exception:
+            if not self.IsCrashed(exception):
+                raise
+            self.Restart('browser crashed')
+            self.ApplyEvasions()
 
-        self.ApplyEvasions()
         wait = WebDriverWait(self.driver, timeout=timeout)
         for iteration in range(retries):
             try:
                 self.driver.get(url)
-            except WebDriverException:
+            except WebDriverException as exception:
+                if self.IsCrashed(exception):
+                    self.Restart('renderer crashed')
+                    self.ApplyEvasions()
+                    wait = WebDriverWait(self.driver, timeout=timeout)
                 time.sleep(1)
                 continue
 
@@ -300,6 +367,67 @@ class Browser:
 
         self.driver.quit()
 
+    def ClearNetworkLog(self):
+
+        try:
+            self.driver.get_log('performance')
+        except WebDriverException:
+            pass
+
+    def GetNetworkResponses(self, resource_types=('XHR', 'Fetch')):
+
+        try:
+            entries = self.driver.get_log('performance')
+        except WebDriverException:
+            return []
+
+        messages = []
+        for entry in entries:
+            try:
+                messages.append(json.loads(entry['message'])['message'])
+            except (KeyError, ValueError):
+                continue
+
+        sent_requests, extra_headers = {}, {}
+        for message in messages:
+            method, params = message.get('method'), message.get('params', {})
+            if method == 'Network.requestWillBeSent':
+                request = params['request']
+                sent_requests[params['requestId']] = request.get('method', 'GET'), request.get('headers', {}), request.get('postData')
+            elif method == 'Network.requestWillBeSentExtraInfo':
+                extra_headers[params['requestId']] = params.get('headers', {})
+
+        responses = []
+        for message in messages:
+            if message.get('method') != 'Network.responseReceived':
+                continue
+
+            params = message['params']
+            response = params['response']
+            mime_type = response.get('mimeType', '')
+            if params.get('type') not in resource_types and 'json' not in mime_type:
+                continue
+
+            try:
+                result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+            except WebDriverException:
+                continue
+
+            body = result.get('body', '')
+            if result.get('base64Encoded'):
+                continue
+
+            method, headers, data = sent_requests.get(params['requestId'], ('GET', {}, None))
+            headers = dict(headers, **extra_headers.get(params['requestId'], {}))
+            headers = {name: value for name, value in headers.items() if not name.startswith(':') and name.lower() != 'content-length'}
+            responses.append((response['url'], mime_type, body, (method, headers, data)))
+
+        return responses
+
+    def GetCookies(self):
+
+        return {cookie['name']: cookie['value'] for cookie in self.driver.get_cookies()}
+
     def BlockUrls(self, urls):
 
         self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': urls})
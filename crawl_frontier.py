@@ -0,0 +1,128 @@
+import re
+import time
+import math
+import heapq
+import requests
+from datetime import datetime
+from multi_processing import Value
+
+class CrawlFrontier:
+
+    def __init__(self, page_regex, max_pages=15, max_time=600, max_depth=1):
+
+        self.page_regex = page_regex
+        self.max_pages, self.max_time, self.max_depth = max_pages, max_time, max_depth
+        self.yields = Value('crawl_yields', {})
+        self.host_yields = self.yields.Get()
+        self.new_yields = {}
+        self.queue, self.seen, self.counter = [], set(), 0
+        self.start_time, self.pages_visited = time.time(), 0
+        self.year_regex, self.halfyear_regex, self.quarter_regex, self.annual_regex = self.CreateRegexes()
+        self.expected_periods = self.GetExpectedPeriods(datetime.now())
+        self.found_periods = set()
+
+    def CreateRegexes(self):
+
+        year_regex = re.compile(r'(?<!\d)(?:19|20)\d{2}(?!\d)')
+        halfyear_regex = re.compile(r'half|semi|semestr|interim|halvår|halfjaar|(?<![a-z])(?:h1|1h|hy)(?![a-z])', re.IGNORECASE)
+        quarter_regex = re.compile(r'quarter|trimestr|kvartal|kwartaal|(?<![a-z])(?:q[1-4]|[1-4]q)(?![a-z])', re.IGNORECASE)
+        annual_regex = r'annual|annuel|jaarverslag|årsrapport|registration|référence|reference|enregistrement' \
+                       r'|(?<![a-z])(?:fy|ra|rfa|udr|urd)(?![a-z])'
+        annual_regex = re.compile(annual_regex, re.IGNORECASE)
+
+        return year_regex, halfyear_regex, quarter_regex, annual_regex
+
+    def GetExpectedPeriods(self, date):
+
+        annual_year = date.year - 1 if date.month > 4 else date.year - 2
+        halfyear_year = date.year if date.month > 9 else date.year - 1
+
+        return set([(annual_year, 'FY'), (halfyear_year, 'H1')])
+
+    def ExtractPeriod(self, url, text):
+
+        text = '%s %s' % (requests.utils.unquote(url.rsplit('/', maxsplit=1)[-1]), text or '')
+        years = [int(year) for year in self.year_regex.findall(text)]
+        if not years:
+            return None
+
+        if self.quarter_regex.search(text):
+            return None
+        elif self.halfyear_regex.search(text):
+            return max(years), 'H1'
+        elif self.annual_regex.search(text):
+            return max(years), 'FY'
+
+        return None
+
+    def GetHost(self, url):
+
+        return requests.utils.urlparse(url).netloc.lower()
+
+    def Score(self, url, text, depth):
+
+        score = 2 * len(self.page_regex.findall(url)) + 3 * len(self.page_regex.findall(text or ''))
+        page_yield = self.host_yields.get(self.GetHost(url), {}).get(url, 0)
+        score += 5 * math.log1p(page_yield) - 2 * depth
+
+        return score
+
+    def Add(self, url, text='', depth=0):
+
+        if url in self.seen or depth > self.max_depth:
+            return
+
+        self.seen.add(url)
+        score = self.Score(url, text, depth)
+        heapq.heappush(self.queue, (-score, self.counter, url, depth))
+        self.counter += 1
+
+    def IsComplete(self):
+
+        return self.expected_periods <= self.found_periods
+
+    def IsCompleteWith(self, documents):
+
+        periods = set(self.ExtractPeriod(url, text) for url, text in documents.items())
+        return self.expected_periods <= self.found_periods | periods
+
+    def IsExhausted(self):
+
+        elapsed_time = time.time() - self.start_time
+        return self.pages_visited >= self.max_pages or elapsed_time >= self.max_time
+
+    def Pop(self):
+
+        if not self.queue or self.IsComplete() or self.IsExhausted():
+            return None
+
+        score, counter, url, depth = heapq.heappop(self.queue)
+        self.pages_visited += 1
+
+        return url, depth
+
+    def AddDocuments(self, page_url, documents):
+
+        if page_url is not None:
+            self.new_yields[page_url] = len(documents)
+
+        for url, text in documents.items():
+            period = self.ExtractPeriod(url, text)
+            if period is not None:
+                self.found_periods.add(period)
+
+    def Save(self):
+
+        elapsed_time = time.time() - self.start_time
+        reason = 'complete' if self.IsComplete() else 'budget exhausted' if self.IsExhausted() else 'frontier empty'
+        print('Crawled %d of %d pages in %.0f seconds (%s)' % (self.pages_visited, len(self.seen), elapsed_time, reason))
+
+        if not self.new_yields:
+            return
+
+        with self.yields:
+            host_yields = self.yields.Get()
+            for url, count in self.new_yields.items():
+                host = self.GetHost(url)
+                host_yields.setdefault(host, {})[url] = count
+            self.yields.Set(host_yields)
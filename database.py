@@ -9,6 +9,19 @@ class Database:
 
         self.connection_details = {'database': '****', 'user': '****', 'password': '****', 
                            'host': '****.****.****.****.****.****.****.****', 'port': '****'}
+        self.statements_columns = ['symbol', 'isin', 'registrant_name', 'market', 'market_full_name', 'address_line',
+                                   'address_city', 'address_country', 'phone_number', 'website', 'is_annual_report',
+                                   'fiscal_year', 'fiscal_period', 'fiscal_year_end_date', 'auditor_name', 'date', 'units',
+                                   'revenue', 'operating_income', 'non_operating_income_expense', 'pretax_income',
+                                   'tax_provision', 'earnings_from_equity_interest', 'discontinued_operations',
+                                   'consolidated_net_income', 'non_controlling_interests', 'net_income',
+                                   'basic_earnings_per_share', 'diluted_earnings_per_share', 'current_assets',
+                                   'non_current_assets', 'total_assets', 'current_liabilities', 'non_current_liabilities',
+                                   'total_liabilities', 'non_current_provisions', 'total_equity', 'common_stock_equity',
+                                   'operating_cash_flow', 'investing_cash_flow', 'financing_cash_flow', 'change_in_cash',
+                                   'beginning_cash_position', 'end_cash_position', 'issuance_of_debt', 'repayment_of_debt',
+                                   'html_data', 'raw_data', 'json_data', 'json_result', 'url', 's3_url', 'updated_at',
+                                   'created_at']
         self.connection = psycopg2.connect(**self.connection_details)
         self.cursor = self.connection.cursor()
         self.SuppressExceptions()
@@ -72,10 +85,13 @@ class Database:
                                 'beginning_cash_position FLOAT, end_cash_position FLOAT, issuance_of_debt FLOAT, '
                                 'repayment_of_debt FLOAT, html_data VARCHAR NOT NULL, raw_data VARCHAR NOT NULL, '
                                 'json_data VARCHAR NOT NULL, json_result VARCHAR NOT NULL, url VARCHAR NOT NULL, '
-                                's3_url VARCHAR NOT NULL, updated_at VARCHAR NOT NULL, PRIMARY KEY (symbol, fiscal_period, date))')
+                                's3_url VARCHAR NOT NULL, updated_at VARCHAR NOT NULL, created_at VARCHAR, '
+                                'PRIMARY KEY (symbol, fiscal_period, date))')
 
             self.cursor.execute('CREATE INDEX euronext_statements_symbol ON euronext_statements(symbol)')
             self.cursor.execute('CREATE INDEX euronext_statements_updated_at ON euronext_statements(updated_at)')
+        else:
+            self.cursor.execute('ALTER TABLE euronext_statements ADD COLUMN IF NOT EXISTS created_at VARCHAR')
 
         self.connection.commit()
 
@@ -123,15 +139,7 @@ class Database:
 
     def AddStatementsData(self, data):
 
-        query = 'INSERT INTO euronext_statements (symbol, isin, registrant_name, market, market_full_name, address_line, ' \
-                'address_city, address_country, phone_number, website, is_annual_report, fiscal_year, fiscal_period, ' \
-                'fiscal_year_end_date, auditor_name, date, units, revenue, operating_income, non_operating_income_expense, ' \
-                'pretax_income, tax_provision, earnings_from_equity_interest, discontinued_operations, consolidated_net_income, ' \
-                'non_controlling_interests, net_income, basic_earnings_per_share, diluted_earnings_per_share, current_assets, ' \
-                'non_current_assets, total_assets, current_liabilities, non_current_liabilities, total_liabilities, ' \
-                'non_current_provisions, total_equity, common_stock_equity, operating_cash_flow, investing_cash_flow, ' \
-                'financing_cash_flow, change_in_cash, beginning_cash_position, end_cash_position, issuance_of_debt, ' \
-                'repayment_of_debt, html_data, raw_data, json_data, json_result, url, s3_url, updated_at) VALUES %s ' \
+        query = 'INSERT INTO euronext_statements (%s) VALUES %%s ' \
                 'ON CONFLICT (symbol, fiscal_period, date) DO UPDATE SET (isin, registrant_name, market, market_full_name, ' \
                 'address_line, address_city, address_country, phone_number, website, is_annual_report, fiscal_year, ' \
                 'fiscal_year_end_date, auditor_name, units, revenue, operating_income, non_operating_income_expense, ' \
@@ -153,7 +161,7 @@ class Database:
                 'excluded.total_equity, excluded.common_stock_equity, excluded.operating_cash_flow, excluded.investing_cash_flow, ' \
                 'excluded.financing_cash_flow, excluded.change_in_cash, excluded.beginning_cash_position, ' \
                 'excluded.end_cash_position, excluded.issuance_of_debt, excluded.repayment_of_debt, excluded.html_data, ' \
-                'excluded.raw_data, excluded.json_data, excluded.json_result, excluded.url, excluded.s3_url, excluded.updated_at)'
+                'excluded.raw_data, excluded.json_data, excluded.json_result, excluded.url, excluded.s3_url, excluded.updated_at)' % ', '.join(self.statements_columns)
         psycopg2.extras.execute_values(self.cursor, query, data, page_size=1000) 
         self.connection.commit()
 
@@ -188,6 +196,15 @@ class Database:
 
         return result
 
+    def GetReportingHistory(self):
+
+        query = 'SELECT symbol, fiscal_period, date, created_at, updated_at FROM euronext_statements'
+        self.cursor.execute(query)
+        result = self.cursor.fetchall()
+        self.connection.commit()
+
+        return result
+
     def GetLastUpdateTime(self):
 
         query = 'SELECT MAX(updated_at) FROM euronext_statements'
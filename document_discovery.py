@@ -0,0 +1,171 @@
+import re
+import time
+import json
+import gzip
+import requests
+from lxml import etree
+
+class DocumentDiscovery:
+
+    def __init__(self, headers, file_regex, max_sitemaps=20, max_time=60):
+
+        self.headers = headers
+        self.file_regex = file_regex
+        self.max_sitemaps, self.max_time = max_sitemaps, max_time
+        self.deadline, self.failed_hosts = None, set()
+        self.sitemap_paths = ['/sitemap.xml', '/sitemap_index.xml', '/sitemap-index.xml']
+        self.feed_paths = ['/feed', '/rss', '/rss.xml', '/feed.xml', '/wp-json/wp/v2/media?mime_type=application/pdf&per_page=100']
+        self.sitemap_regex = re.compile(r'document|media|pdf|invest|finan|report|publication|attachment', re.IGNORECASE)
+        self.pdf_regex = re.compile(r'https?:\/\/[^\s"\'<>]+?\.pdf(?=[?#"\'<>\s]|$)', re.IGNORECASE)
+
+    def Fetch(self, url, timeout=10):
+
+        host = requests.utils.urlparse(url).netloc
+        if host in self.failed_hosts:
+            return None
+
+        if self.deadline is not None:
+            timeout = min(timeout, self.deadline - time.time())
+            if timeout <= 0:
+                return None
+
+        try:
+            response = requests.get(url, headers=self.headers, timeout=timeout, verify=False)
+        except (requests.ConnectionError, requests.Timeout):
+            self.failed_hosts.add(host)
+            return None
+        except requests.RequestException:
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        content = response.content
+        if content[:2] == b'\x1f\x8b':
+            try:
+                content = gzip.decompress(content)
+            except OSError:
+                return None
+
+        return content
+
+    def GetSitemapUrls(self, base_url):
+
+        sitemap_urls = []
+        content = self.Fetch(base_url + '/robots.txt')
+        if content is not None:
+            for line in content.decode('utf-8', errors='ignore').splitlines():
+                if line.lower().startswith('sitemap:'):
+                    sitemap_urls.append(line.split(':', maxsplit=1)[-1].strip())
+
+        for sitemap_path in self.sitemap_paths:
+            sitemap_url = base_url + sitemap_path
+            if sitemap_url not in sitemap_urls:
+                sitemap_urls.append(sitemap_url)
+
+        return sitemap_urls
+
+    def ParseXml(self, content):
+
+        parser = etree.XMLParser(recover=True, resolve_entities=False, no_network=True)
+        try:
+            root = etree.fromstring(content, parser=parser)
+        except (etree.XMLSyntaxError, ValueError):
+            return None
+
+        return root
+
+    def ExtractSitemapUrls(self, base_url):
+
+        queue, visited, urls = self.GetSitemapUrls(base_url), set(), {}
+        while queue and len(visited) < self.max_sitemaps and (self.deadline is None or time.time() < self.deadline):
+            sitemap_url = queue.pop(0)
+            if sitemap_url in visited:
+                continue
+
+            visited.add(sitemap_url)
+            content = self.Fetch(sitemap_url)
+            root = self.ParseXml(content) if content else None
+            if root is None:
+                continue
+
+            locations = [location.text.strip() for location in root.xpath('//*[local-name()="loc"]') if location.text]
+            if etree.QName(root).localname == 'sitemapindex':
+                locations = sorted(locations, key=lambda location: not self.sitemap_regex.search(location))
+                queue.extend(locations)
+            else:
+                for location in locations:
+                    urls.setdefault(location, '')
+
+        return urls
+
+    def ExtractFeedUrls(self, content):
+
+        urls = {}
+        root = self.ParseXml(content)
+        if root is not None:
+            for item in root.xpath('//*[local-name()="item" or local-name()="entry"]'):
+                titles = item.xpath('./*[local-name()="title"]/text()')
+                title = titles[0].strip() if titles else ''
+                links = item.xpath('./*[local-name()="link"]/text() | ./*[local-name()="link"]/@href '
+                                   '| ./*[local-name()="enclosure"]/@url')
+                for link in links:
+                    urls.setdefault(link.strip(), title)
+
+            return urls
+
+        try:
+            data = json.loads(content)
+        except ValueError:
+            return urls
+
+        for url, title in self.WalkJson(data):
+            urls.setdefault(url, title)
+
+        return urls
+
+    def WalkJson(self, data, title='', base_url=None):
+
+        if isinstance(data, dict):
+            for key in ['title', 'name', 'label', 'description']:
+                value = data.get(key)
+                if isinstance(value, dict):
+                    value = value.get('rendered')
+                if isinstance(value, str) and value.strip():
+                    title = value.strip()
+                    break
+
+            for value in data.values():
+                yield from self.WalkJson(value, title, base_url)
+
+        elif isinstance(data, list):
+            for value in data:
+                yield from self.WalkJson(value, title, base_url)
+
+        elif isinstance(data, str) and '.pdf' in data.lower():
+            matches = list(self.pdf_regex.finditer(data))
+            for match in matches:
+                yield match.group(), title
+
+            if not matches and base_url is not None and re.search(r'^[^\s<>"\']+\.pdf(?:[?#]\S*)?$', data.strip(), re.IGNORECASE):
+                yield requests.compat.urljoin(base_url, data.strip()), title
+
+    def __call__(self, page_url):
+
+        components = requests.utils.urlparse(page_url)
+        base_url = '%s://%s' % (components.scheme or 'https', components.netloc)
+        self.deadline, self.failed_hosts = time.time() + self.max_time, set()
+
+        urls = self.ExtractSitemapUrls(base_url)
+        for feed_path in self.feed_paths:
+            content = self.Fetch(base_url + feed_path)
+            if content:
+                urls.update(self.ExtractFeedUrls(content))
+
+        document_urls = {}
+        for url, text in urls.items():
+            if re.search(r'\.pdf(\?|$)', url, re.IGNORECASE):
+                if self.file_regex.search(url) or self.file_regex.search(text):
+                    document_urls[url] = text
+
+        return document_urls
@@ -1,22 +1,41 @@
 import re
+import json
 import time
 import requests
+from urllib.parse import urlparse, parse_qsl, urlencode
+from concurrent.futures import ThreadPoolExecutor
 from lxml.html import document_fromstring
 from browser import Browser
+from crawl_frontier import CrawlFrontier
+from document_discovery import DocumentDiscovery
+from multi_processing import Value
 
 class Euronext:
 
     def __init__(self):
 
-        self.browser = Browser()
+        self.driver_browser = None
         self.headers = self.GetHeaders()
         self.languages = set(['bg', 'cs', 'da', 'de', 'nl', 'el', 'et', 'fi', 'fr', 'hr', 'hu', 'is', 'it', 
                               'lv', 'lt', 'lb', 'mt', 'no', 'pl', 'pt', 'ro', 'sk', 'sl', 'es', 'sv'])
         self.language_regex, self.page_regex, self.file_regex = self.GetRegexes()
+        self.page_params = ['page', 'pagenumber', 'pageindex', 'pagenum', 'p']
+        self.offset_params = ['offset', 'start', 'skip', 'from']
+        self.size_params = ['limit', 'size', 'pagesize', 'per_page', 'perpage', 'count', 'rows', 'take']
+        self.document_discovery = DocumentDiscovery(self.headers, self.file_regex)
 
     def __del__(self):
         
-        self.browser.Quit()
+        if self.driver_browser is not None:
+            self.driver_browser.Quit()
+
+    @property
+    def browser(self):
+
+        if self.driver_browser is None:
+            self.driver_browser = Browser()
+
+        return self.driver_browser
 
     def GetHeaders(self):
 
@@ -102,29 +121,82 @@ class Euronext:
 
         return companies
 
-    def GetCompanyInfo(self, info_url):
+    def LoadCompanyPage(self, info_url, timeout=20, retries=3):
+
+        for iteration in range(retries):
+            try:
+                response = requests.get(info_url, headers=self.headers, timeout=timeout)
+            except requests.RequestException:
+                time.sleep(1)
+                continue
+
+            if response.status_code == 200:
+                root = document_fromstring(response.text)
+                for line_break in root.iter('br'):
+                    line_break.tail = '\n' + (line_break.tail or '')
 
-        if self.browser.Url() != info_url:
-            self.browser.LoadPage(info_url)
+                return root
 
-        description_element = self.browser.WaitForElement('p[class^="address__text"]')
-        market_full_name = description_element.text.split('\n')[0].strip() if description_element else None
+            time.sleep(1)
 
-        address_elements = self.browser.GetElement('address[id] > div:nth-of-type(1) > div:not(:first-of-type)', multiple=True)
+        return None
+
+    def ExtractCompanyInfo(self, root):
+
+        description_elements = root.cssselect('p[class^="address__text"]')
+        if description_elements:
+            market_full_name = description_elements[0].text_content().strip().split('\n')[0].strip()
+        else:
+            market_full_name = None
+
+        address_elements = root.cssselect('address[id] > div:nth-of-type(1) > div')[1:]
         if len(address_elements) >= 3:
-            address_line = address_elements[0].text.strip()
-            address_city = address_elements[-2].text.strip()
-            address_country = address_elements[-1].text.strip()
+            address_line = address_elements[0].text_content().strip()
+            address_city = address_elements[-2].text_content().strip()
+            address_country = address_elements[-1].text_content().strip()
         else:
             address_line, address_city, address_country = None, None, None
 
-        phone_element = self.browser.GetElement('address[id] a[href^="tel"]')
-        phone_number = phone_element.text.replace(' ', '').strip() if phone_element else None
-        website_element = self.browser.GetElement('address[id] a[href^="http"]')
-        website = website_element.text.strip() if website_element else None
+        phone_elements = root.cssselect('address[id] a[href^="tel"]')
+        phone_number = phone_elements[0].text_content().replace(' ', '').strip() if phone_elements else None
+        website_elements = root.cssselect('address[id] a[href^="http"]')
+        website = website_elements[0].text_content().strip() if website_elements else None
 
         return market_full_name, address_line, address_city, address_country, phone_number, website
 
+    def ExtractWebsiteUrl(self, root):
+
+        page_links = root.cssselect('address a[target="_blank"]')
+        if page_links:
+            page_url = page_links[0].attrib.get('href', '').strip()
+            if page_url and not page_url.startswith('http'):
+                page_url = 'https://%s' % page_url
+
+            return page_url or None
+
+        email_links = root.cssselect('a[href^="mailto"]')
+        if email_links:
+            email_url = email_links[0].attrib['href']
+            return 'https://%s' % email_url.split('@')[-1]
+
+        return None
+
+    def GetCompanyData(self, info_url):
+
+        root = self.LoadCompanyPage(info_url)
+        if root is None:
+            return None
+
+        return self.ExtractCompanyInfo(root), self.ExtractWebsiteUrl(root)
+
+    def GetCompaniesData(self, info_urls, workers=16):
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            companies_data = executor.map(self.GetCompanyData, info_urls)
+            companies_data = dict(zip(info_urls, companies_data))
+
+        return companies_data
+
     def ExtractWebsite(self):
 
         links = self.browser.GetElement('a[data-toggle]', multiple=True)
@@ -188,50 +260,52 @@ class Euronext:
         page_url = self.GetEnglishUrl(page_url) or page_url
         page_url = page_url.strip('/')
         if not self.browser.LoadPage(page_url):
-            return set()
+            return {}
 
         self.browser.WaitForElement('body')
         urls = self.GetUrls()
-        page_urls = set([] if is_home_page else [page_url])
+        page_urls = {} if is_home_page else {page_url: ''}
 
         for url, text in urls:
             if url and re.search(r'\.html?|\/[^.]+$', url):
                 if (not is_home_page and url.startswith(page_url)) or self.page_regex.search(url) or self.page_regex.search(text):
                     url = re.split(r'#|\?', url)[0].strip('/')
-                    page_urls.add(url)
+                    page_urls[url] = page_urls.get(url) or text
                     
         slash_regex = re.compile(r'(?<!:)\/\/')
         for url in list(page_urls):
             url_without_prefix = slash_regex.sub('/', self.language_regex.sub('', url))
             if url_without_prefix != url and url_without_prefix in page_urls:
-                page_urls.discard(url)               
+                page_urls.pop(url)               
 
         return page_urls
 
-    def GetPageUrls(self, info_url):
+    def FilterPageUrls(self, urls, page_url):
 
-        if self.browser.Url() != info_url:
-            self.browser.LoadPage(info_url)
+        host = requests.utils.urlparse(page_url).netloc
+        page_urls = {}
+        for url, text in urls:
+            if url and requests.utils.urlparse(url).netloc == host and re.search(r'\.html?|\/[^.]+$', url):
+                if self.page_regex.search(url) or self.page_regex.search(text):
+                    url = re.split(r'#|\?', url)[0].strip('/')
+                    page_urls[url] = page_urls.get(url) or text
 
-        page_link = self.browser.WaitForElement('address a[target="_blank"]')
-        if page_link is None:
-            email_link = self.browser.GetElement('a[href^="mailto"]')
-            if email_link is None:
-                page_url = self.ExtractWebsite()
-            else:
-                email_url = email_link.get_attribute('href')
-                page_url = 'https://%s' % email_url.split('@')[-1]
-        else:
-            page_url = page_link.get_attribute('href')
-            if not page_url.startswith('http'):
-                page_url = 'https://%s' % page_url
+        return page_urls
+
+    def GetPageUrls(self, info_url, page_url=None):
+
+        if page_url is None:
+            if self.browser.Url() != info_url:
+                self.browser.LoadPage(info_url)
+
+            page_url = self.ExtractWebsite()
        
         if page_url is None:
-            page_urls = set()
+            page_urls = {}
         else:
             page_urls = self.ExtractPageUrls(page_url)            
 
-        return list(page_urls)
+        return list(page_urls.items())
 
     def GetUniqueSelector(self, element):
 
@@ -383,10 +457,154 @@ class Euronext:
 
         return urls
 
-    def ExtractStatementUrls(self, page_url):
+    def ExtractResponseUrls(self, url, mime_type, body):
+
+        urls = set()
+        if 'json' in mime_type or body.lstrip()[:1] in ('{', '['):
+            try:
+                data = json.loads(body)
+            except ValueError:
+                return urls, None
+
+            for document_url, title in self.document_discovery.WalkJson(data, base_url=url):
+                urls.add((document_url, title))
+
+            return urls, data
+
+        if '<a' in body:
+            try:
+                root = document_fromstring(body)
+            except ValueError:
+                return urls, None
+
+            root.make_links_absolute(url)
+            for link in root.cssselect('a[href]'):
+                urls.add((link.attrib['href'], link.text_content().strip()))
+
+        return urls, None
+
+    def GetNextPageParams(self, params, data):
+
+        lowercase_names = [name.lower() for name, value in params]
+        size = next((int(value) for name, value in params if name.lower() in self.size_params and value.isdigit()), None)
+        if size is None:
+            lists = [data] if isinstance(data, list) else [value for value in data.values() if isinstance(value, list)]
+            size = max((len(item) for item in lists), default=0)
+
+        params = list(params)
+        for idx, (name, value) in enumerate(params):
+            if not value.isdigit():
+                continue
+
+            if lowercase_names[idx] in self.page_params:
+                params[idx] = name, str(int(value) + 1)
+            elif lowercase_names[idx] in self.offset_params and size:
+                params[idx] = name, str(int(value) + size)
+            else:
+                continue
+
+            return params
+
+        return None
+
+    def GetNextPageRequest(self, url, body, data):
+
+        components = urlparse(url)
+        query = self.GetNextPageParams(parse_qsl(components.query, keep_blank_values=True), data)
+        if query is not None:
+            return components._replace(query=urlencode(query)).geturl(), body
+
+        if not body:
+            return None
+
+        try:
+            body_data = json.loads(body)
+        except ValueError:
+            body_data = None
+
+        if isinstance(body_data, dict):
+            params = [(name, str(value)) for name, value in body_data.items() if type(value) is int]
+            params = self.GetNextPageParams(params, data)
+            if params is None:
+                return None
+
+            body_data.update((name, int(value)) for name, value in params)
+            return url, json.dumps(body_data)
+
+        params = self.GetNextPageParams(parse_qsl(body, keep_blank_values=True), data)
+        return None if params is None else (url, urlencode(params))
+
+    def FetchApiPages(self, url, request, data, urls, max_pages=20):
+
+        method, headers, body = request
+        cookies = self.browser.GetCookies()
+        new_urls, exhausted = set(), None
+        for iteration in range(max_pages):
+            next_request = self.GetNextPageRequest(url, body, data)
+            if next_request is None:
+                exhausted = True if iteration > 0 else None
+                break
+
+            url, body = next_request
+            exhausted = False
+            try:
+                response = requests.request(method, url, headers=headers or self.headers, data=body, cookies=cookies, timeout=20)
+            except requests.RequestException:
+                break
+
+            if response.status_code != 200:
+                break
+
+            page_urls, data = self.ExtractResponseUrls(url, response.headers.get('content-type', ''), response.text)
+            page_urls -= urls | new_urls
+            if data is None:
+                break
+
+            if not page_urls:
+                exhausted = True
+                break
+
+            new_urls |= page_urls
+
+        return new_urls, exhausted
+
+    def ExtractNetworkUrls(self):
+
+        urls, paginations = set(), []
+        for url, mime_type, body, request in self.browser.GetNetworkResponses():
+            response_urls, data = self.ExtractResponseUrls(url, mime_type, body)
+            has_documents = any(re.search(r'\.pdf(\?|$)', response_url) for response_url, text in response_urls)
+            if has_documents and isinstance(data, (dict, list)):
+                page_urls, exhausted = self.FetchApiPages(url, request, data, response_urls)
+                response_urls |= page_urls
+                if exhausted is not None:
+                    paginations.append(exhausted)
+
+            urls |= response_urls
+
+        return urls, bool(paginations) and all(paginations)
+
+    def IsStatementUrl(self, url, text):
+
+        if url and re.search(r'\.pdf(\?|$)', url):
+            return bool(self.file_regex.search(url) or self.file_regex.search(text))
+
+        return False
 
+    def FilterStatementUrls(self, urls):
+
+        statement_urls = {}
+        for url, text in urls:
+            if self.IsStatementUrl(url, text):
+                statement_urls[url] = statement_urls.get(url) or text
+
+        return statement_urls
+
+    def ExtractStatementUrls(self, page_url, frontier=None):
+
+        self.browser.ClearNetworkLog()
         if not self.browser.LoadPage(page_url):
-            return set()
+            return {}, set()
 
         self.browser.WaitForElement('body')
         link = self.browser.GetElement('head > link[rel="alternate"][hreflang="en"]')
@@ -398,19 +616,60 @@ class Euronext:
         self.browser.ScrollToBottom()
         time.sleep(1)
         urls = self.GetUrls()
-        urls |= self.CheckLists()
-        urls |= self.SelectOptions()
-               
-        statement_urls = set()
-        for url, text in urls:
-            if url and re.search(r'\.pdf(\?|$)', url):
-                if self.file_regex.search(url) or self.file_regex.search(text):
-                    statement_urls.add(url)
+        network_urls, pages_exhausted = self.ExtractNetworkUrls()
+        urls |= network_urls
+        is_complete = frontier is not None and frontier.IsCompleteWith(self.FilterStatementUrls(urls))
+        if not (pages_exhausted or is_complete):
+            urls |= self.CheckLists()
+            urls |= self.SelectOptions()
 
-        return statement_urls
+        return self.FilterStatementUrls(urls), urls
+
+    def DiscoverStatementUrls(self, page_url, frontier):
+
+        start_time = time.time()
+        try:
+            statement_urls = self.document_discovery(page_url)
+        except:
+            statement_urls = {}
+
+        frontier.AddDocuments(None, statement_urls)
+        discovery_time = time.time() - start_time
+
+        return statement_urls, discovery_time
 
-    def GetStatementUrls(self, info_url):
+    def SaveDiscoveryStats(self, page_url, documents, discovery_time, crawl_time):
 
+        host = requests.utils.urlparse(page_url).netloc.lower()
+        discovery_stats = Value('discovery_stats', {})
+        with discovery_stats:
+            stats = discovery_stats.Get()
+            host_stats = stats.get(host, {})
+            if crawl_time is None:
+                saved_time = max(0.0, host_stats.get('crawl_time', 0.0) - discovery_time)
+                message = 'browser crawl skipped, saved %.0f seconds' % saved_time
+            else:
+                host_stats['crawl_time'] = crawl_time
+                message = 'browser crawl took %.0f seconds' % crawl_time
+
+            host_stats.update(discovery_time=discovery_time, documents=documents, skipped=crawl_time is None)
+            stats[host] = host_stats
+            discovery_stats.Set(stats)
+
+        print('Discovered %d documents on %s in %.1f seconds, %s' % (documents, host, discovery_time, message))
+
+    def GetStatementUrls(self, info_url, page_url=None):
+
+        frontier = CrawlFrontier(self.page_regex)
+        if page_url is not None:
+            statement_urls, discovery_time = self.DiscoverStatementUrls(page_url, frontier)
+            if frontier.IsComplete():
+                self.SaveDiscoveryStats(page_url, len(statement_urls), discovery_time, None)
+                return list(statement_urls)
+        else:
+            statement_urls, discovery_time = {}, 0.0
+
+        documents, start_time = len(statement_urls), time.time()
         urls = ['*://*googlesyndication.com/*', '*://*doubleclick.net/*', '*://*googletagmanager.com/*', 
                 '*://*google-analytics.com/*', '*://*cloudflare.com/*', '*://*facebook.net/*', 
                 '*://*cookiebot.com/*', '*://*cookieinformation.com/*', '*://*consentframework.com/*', 
@@ -418,15 +677,31 @@ class Euronext:
         self.browser.BlockUrls(urls)
 
         try:
-            page_urls = self.GetPageUrls(info_url)
+            page_urls = self.GetPageUrls(info_url, page_url)
         except:
-            return []
+            return list(statement_urls)
 
-        statement_urls = set()
-        for page_url in page_urls:
+        for url, text in page_urls:
+            frontier.Add(url, text)
+
+        while 1:
+            item = frontier.Pop()
+            if item is None:
+                break
+
+            crawl_url, depth = item
             try:
-                statement_urls |= self.ExtractStatementUrls(page_url)
+                page_statement_urls, urls = self.ExtractStatementUrls(crawl_url, frontier)
             except:
                 continue
 
+            frontier.AddDocuments(crawl_url, page_statement_urls)
+            statement_urls.update(page_statement_urls)
+            for url, text in self.FilterPageUrls(urls, crawl_url).items():
+                frontier.Add(url, text, depth + 1)
+
+        frontier.Save()
+        if page_url is not None:
+            self.SaveDiscoveryStats(page_url, documents, discovery_time, time.time() - start_time)
+
         return list(statement_urls)
\ No newline at end of file
@@ -15,6 +15,7 @@ from database import Database
 from metadata_extractor import MetadataExtractor
 from table_extractor import TableExtractor
 from item_standardizer import ItemStandardizer
+from refresh_scheduler import RefreshScheduler
 from multi_processing import StdOut, Value, Pool
 
 class InternationalFinancials:
@@ -25,6 +26,7 @@ class InternationalFinancials:
         self.metadata_extractor = MetadataExtractor()
         self.table_extractor = TableExtractor()
         self.item_standardizer = ItemStandardizer()
+        self.refresh_scheduler = RefreshScheduler(self.database)
         self.s3_client = None
         self.last_update_time = None
         self.companies = self.GetCompanies()
@@ -60,7 +62,7 @@ class InternationalFinancials:
             rows = [line, rows[0], line, *rows[1:], line]
             rows = [' %s ' % '_'.join(row) if idx == 0 else '|%s|' % '|'.join(row) for idx, row in enumerate(rows)]
 
-            html_data.append(statement[-3])
+            html_data.append(statement[-3].GetHtml())
             raw_data.append('\n'.join(rows))
             json_data.append(statement[-1])
 
@@ -132,8 +134,8 @@ class InternationalFinancials:
         if key_pages is None:
             return []
 
-        tables = self.table_extractor(key_pages)
-        separate_statements = self.item_standardizer(tables)
+        pages_tables = self.table_extractor.Stream(key_pages)
+        separate_statements = self.item_standardizer.Stream(pages_tables)
         separate_statements = list(separate_statements.values())
         statements = []
 
@@ -169,22 +171,41 @@ class InternationalFinancials:
 
         updated_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         key = lambda item: sum(0 if value is None else 1 for value in item)
-        data = [max(items, key=key) + (updated_at,) for items in data_map.values()]
+        data = [max(items, key=key) + (updated_at, updated_at) for items in data_map.values()]
+        columns = self.database.statements_columns
+        for item in data:
+            if len(item) != len(columns):
+                raise ValueError('Statement row has %d fields, expected %d columns' % (len(item), len(columns)))
+
         self.database.AddStatementsData(data)
+        rows = [dict(zip(columns, item)) for item in data]
 
-        filter = lambda item: (item[0], item[3], item[4] or 'N/A', item[11] or 'N/A', item[12], item[-3], item[-1])
-        filtered_data = list(set(filter(item) for item in data))
+        filter = lambda row: (row['symbol'], row['market'], row['market_full_name'] or 'N/A', row['fiscal_year'] or 'N/A',
+                              row['fiscal_period'], row['url'], row['updated_at'])
+        filtered_data = list(set(filter(row) for row in rows))
         self.database.AddUrlsData(filtered_data)
 
-        filter = lambda item: (item[0], item[2], item[12], item[15], item[-1])
-        filtered_data = list(set(filter(item) for item in data))
+        filter = lambda row: (row['symbol'], row['registrant_name'], row['fiscal_period'], row['date'], row['updated_at'])
+        filtered_data = list(set(filter(row) for row in rows))
         self.database.AddFeedData(filtered_data)
 
+    def PrepareCompaniesData(self, companies):
+
+        print('Extracting company information...')
+        euronext = Euronext()
+        info_urls = [company[-1] for company in companies]
+        companies_data = euronext.GetCompaniesData(info_urls)
+        Value('companies_data', {}).Set(companies_data)
+        Value('parsing_queue', []).Set(companies)
+        Value('parsing_session', 0).Set(0)
+
     def ParseStatements(self):
 
         stdout = StdOut() 
         stdout.redirect()
         session = Value('parsing_session', 0)
+        companies = Value('parsing_queue', self.companies).Get()
+        companies_data = Value('companies_data', {}).Get()
         euronext = Euronext()
 
         while 1:
@@ -192,13 +213,15 @@ class InternationalFinancials:
                 idx = session.Get()
                 session.Set(idx + 1)
             
-            if idx >= len(self.companies):
+            if idx >= len(companies):
                 break
 
-            *company, info_url = self.companies[idx]
+            *company, info_url = companies[idx]
             print('Parsing statements for %s...' % company[2])
-            company_info = company + list(euronext.GetCompanyInfo(info_url))
-            statement_urls = euronext.GetStatementUrls(info_url)
+            company_data = companies_data.get(info_url) or euronext.GetCompanyData(info_url)
+            company_info, page_url = company_data or ((None,) * 6, None)
+            company_info = company + list(company_info)
+            statement_urls = euronext.GetStatementUrls(info_url, page_url)
             cached_urls = self.database.GetCachedUrls(company[0])
             statement_urls = sorted(set(statement_urls) - set(cached_urls))
 
@@ -218,24 +241,25 @@ class InternationalFinancials:
             if data:
                 self.database.AddCachedUrlsData(data)
 
-    def UpdateStatements(self):
+            self.refresh_scheduler.SetCrawlTime(company[0])
 
-        if self.last_update_time is None:
-            last_update_time = self.database.GetLastUpdateTime()
-            last_update_time = datetime.strptime(last_update_time, '%Y-%m-%d %H:%M:%S')
-            self.last_update_time = last_update_time
+    def UpdateStatements(self):
 
         time_now = datetime.now()
-        if time_now - self.last_update_time < timedelta(days=7):
+        if self.last_update_time is not None and time_now - self.last_update_time < timedelta(hours=1):
             return
 
-        print('Updating statements...')
-        Value('parsing_session', 0).Set(0)
+        self.last_update_time = time_now
+        companies = self.refresh_scheduler.GetDueCompanies(self.companies, time_now)
+        if not companies:
+            return
+
+        print('Updating statements for %d companies...' % len(companies))
+        self.PrepareCompaniesData(companies)
         pool = Pool()
         pool.Run(self.ParseStatements)
 
-        print('All statements were updated')
-        self.last_update_time = datetime.now()
+        print('Statements were updated for %d companies' % len(companies))
 
     def Run(self):
 
@@ -243,6 +267,7 @@ class InternationalFinancials:
         stdout.redirect()
 
         if not self.database.StatementsDataExist():
+            self.PrepareCompaniesData(self.companies)
             pool = Pool()
             pool.Run(self.ParseStatements)
             print('All statements were parsed')
@@ -3,14 +3,20 @@ import json
 import fitz
 from io import BytesIO
 from collections import OrderedDict
-from difflib import SequenceMatcher
+from text_layer_cache import TextLayerCache
 
 class ItemStandardizer:
 
-    def __init__(self):
+    def __init__(self, cache_text=False):
 
         self.statement_names = ['income_statement', 'balance_sheet_statement', 'cash_flow_statement']
-        self.title_regexes, self.item_regexes = self.CreateRegexes()
+        self.title_regexes, self.item_regexes, self.item_indices, titles_map = self.CreateRegexes()
+        self.titles = list(titles_map.items())
+        self.section_regex = re.compile(r'financial\s+statements|[ée]tats\s+financiers|comptes\s+consolid[ée]s|jaarrekening|[åa]rsregnskap',
+                                        re.IGNORECASE)
+        self.good_ratio = 0.6
+        self.label_cache, self.label_cache_size = {}, 65536
+        self.text_layer_cache = TextLayerCache() if cache_text else None
 
     def CreateRegexes(self):
 
@@ -18,21 +24,29 @@ class ItemStandardizer:
         with open(path, 'r', encoding='utf-8') as file:
            structures = json.load(file, object_pairs_hook=OrderedDict)
 
-        title_regexes, item_regexes = {}, {}       
+        title_regexes, item_regexes, item_indices, titles_map = {}, {}, {}, OrderedDict()
         for statement_name in self.statement_names:
             structure = structures[statement_name]
             titles, items = structure['titles'], structure['items']
 
-            titles = [re.sub(r'\s+', '\s+', title) for title in titles]
+            for title in titles:
+                titles_map.setdefault(' '.join(title.lower().split()), []).append(statement_name)
+
+            titles = [re.sub(r'\s+', r'\\s+', title) for title in titles]
             regex = r'%s' % '|'.join(titles)
             regex = re.compile(regex, re.IGNORECASE)
             title_regexes[statement_name] = regex
 
-            regexes = OrderedDict()
+            regexes, variants, fragments_map = OrderedDict(), [], {}
             for item, names in items.items():
                 for idx, name in enumerate(names):
                     name = re.split(r'\s+', name)
+                    fragments = set(fragment for token in name for fragment in token.lower().split('.') if fragment) or {''}
+                    for fragment in fragments:
+                        fragments_map.setdefault(fragment, []).append(len(variants))
+
                     name = '.+?'.join('(%s)' % token for token in name)
+                    variants.append((item, re.compile(name, re.IGNORECASE), len(fragments)))
                     names[idx] = name
 
                 regex = r'%s' % '|'.join(names)
@@ -40,48 +54,106 @@ class ItemStandardizer:
                 regexes[item] = regex
 
             item_regexes[statement_name] = regexes
+            item_indices[statement_name] = variants, fragments_map
+
+        return title_regexes, item_regexes, item_indices, titles_map
+
+    def GetText(self, page, document_key=None):
+
+        if document_key is not None:
+            text = self.text_layer_cache.LoadText(document_key, page.number)
+            if text is not None:
+                return text
+
+        text = page.get_text()
+        if document_key is not None:
+            self.text_layer_cache.SaveText(document_key, page.number, text)
+
+        return text
+
+    def GetSectionPages(self, document):
+
+        try:
+            toc = document.get_toc(simple=True)
+        except:
+            return []
+
+        section_pages = set()
+        for idx, (level, title, page_number) in enumerate(toc):
+            if page_number < 1 or not self.section_regex.search(title):
+                continue
+
+            next_numbers = [entry[2] for entry in toc[idx + 1:] if entry[0] <= level and entry[2] >= page_number]
+            last_number = next_numbers[0] if next_numbers else document.page_count
+            section_pages.update(range(page_number - 1, min(last_number, document.page_count)))
+
+        return sorted(section_pages)
 
-        return title_regexes, item_regexes
+    def FindTitles(self, text, flags):
+
+        text, is_key_page = ' '.join(text.lower().split()), False
+        for title, statement_names in self.titles:
+            if is_key_page and all(flags[statement_name] for statement_name in statement_names):
+                continue
+            if title not in text:
+                continue
+
+            is_key_page = True
+            for statement_name in statement_names:
+                flags[statement_name] = True
+
+            if all(flags.values()):
+                break
+
+        return is_key_page
+
+    def ScanPages(self, document, page_indices, flags, document_key=None):
+
+        key_indices = []
+        for idx in page_indices:
+            text = self.GetText(document[idx], document_key)
+            if self.FindTitles(text, flags):
+                key_indices.append(idx)
+
+        return key_indices
 
     def GetKeyPages(self, document):
 
+        document_key = self.text_layer_cache.GetDocumentKey(document) if self.text_layer_cache is not None else None
         try:
             document = fitz.open(stream=document, filetype='pdf')
         except:
             return None
 
-        title_regexes = list(self.title_regexes.items())
         flags = dict.fromkeys(self.title_regexes.keys(), False)
-        page_indices = []
+        section_pages = self.GetSectionPages(document)
+        key_indices = self.ScanPages(document, section_pages or range(document.page_count), flags, document_key)
 
-        for idx, page in enumerate(document):
-            text, is_key_page = page.get_text(), False
-            for statement_name, title_regex in title_regexes:
-                match = title_regex.search(text)
-                if match is not None:
-                    flags[statement_name] = True
-                    is_key_page = True
-
-            if not is_key_page:
-                page_indices.append(idx)
+        if section_pages and not all(flags.values()):
+            section_pages = set(section_pages)
+            other_pages = [idx for idx in range(document.page_count) if idx not in section_pages]
+            key_indices = sorted(key_indices + self.ScanPages(document, other_pages, flags, document_key))
 
         if all(flags.values()):
             try:
+                key_indices = set(key_indices)
+                page_indices = [idx for idx in range(document.page_count) if idx not in key_indices]
                 if page_indices:
                     document.delete_pages(page_indices)
-                return BytesIO(document.write(clean=True))
+                return BytesIO(document.write(clean=True, no_new_id=True))
             except:
                 pass
 
         return None
 
-    def GetSimilarityRatio(self, x, y):
+    def GetSimilarityRatio(self, label, match):
 
-        x, y = x.lower(), y.lower()
-        matcher = SequenceMatcher(None, x, y)
-        similarity_ratio = matcher.ratio()
+        spans = [match.span(idx) for idx, token in enumerate(match.groups(), 1) if token]
+        name_length = sum(end - start for start, end in spans) + len(spans) - 1
+        overlap = sum(end - start for start, end in spans)
+        overlap += sum(1 for (_, end), (start, _) in zip(spans, spans[1:]) if ' ' in label[end:start])
 
-        return similarity_ratio
+        return 2 * overlap / (len(label) + name_length)
 
     def CorrectIncomeStatement(self, statement):
 
@@ -161,32 +233,70 @@ class ItemStandardizer:
 
         return statement
 
+    def GetLabelRatios(self, statement_name, key):
+
+        label = key.lower()
+        label_ratios = self.label_cache.get((statement_name, label))
+        if label_ratios is not None:
+            return label_ratios
+
+        variants, fragments_map = self.item_indices[statement_name]
+        fragments_counts = {}
+        for fragment, variant_indices in fragments_map.items():
+            if fragment in label:
+                for variant_idx in variant_indices:
+                    fragments_counts[variant_idx] = fragments_counts.get(variant_idx, 0) + 1
+
+        matches = {}
+        for variant_idx in sorted(fragments_counts.keys()):
+            item, regex, fragments_count = variants[variant_idx]
+            if fragments_counts[variant_idx] < fragments_count:
+                continue
+
+            match = regex.search(label)
+            if match is not None and (item not in matches or match.start() < matches[item].start()):
+                matches[item] = match
+
+        label_ratios = dict((item, self.GetSimilarityRatio(label, match)) for item, match in matches.items())
+
+        if len(self.label_cache) >= self.label_cache_size:
+            self.label_cache.clear()
+        self.label_cache[(statement_name, label)] = label_ratios
+
+        return label_ratios
+
+    def MapItems(self, statement_name, keys):
+
+        keys_ratios = [(key, self.GetLabelRatios(statement_name, key)) for key in keys]
+        items_map = OrderedDict()
+        for item in self.item_regexes[statement_name].keys():
+            best_key, best_ratio = None, None
+            for key, label_ratios in keys_ratios:
+                similarity_ratio = label_ratios.get(item)
+                if similarity_ratio is not None and (best_ratio is None or similarity_ratio > best_ratio):
+                    best_key, best_ratio = key, similarity_ratio
+
+            items_map[item] = best_key
+
+        return items_map
+
     def ExtractStatements(self, statement_name, statement_table):
 
         rows = [row.copy() for row in statement_table['body']]
         html_data = [row.pop('html_data') for row in rows][0]
         raw_data = [row.pop('raw_data') for row in rows][0]
-        item_regexes, statements = self.item_regexes[statement_name], []
+        items_maps, statements = {}, []
 
         for row in rows:
-            keys = [key for key in row.keys() if key != 'date' and key != 'units']
+            keys = tuple(key for key in row.keys() if key != 'date' and key != 'units')
             statement = OrderedDict([('date', row['date']), ('units', row['units'])])
 
-            for item, regex in item_regexes.items():
-                keys_and_ratios = []
-                for key in keys:
-                    match = regex.search(key) 
-                    if match is not None:
-                        tokens = match.groups()
-                        name = ' '.join(token for token in tokens if token)
-                        similarity_ratio = self.GetSimilarityRatio(key, name)
-                        keys_and_ratios.append((key, similarity_ratio))
-
-                if keys_and_ratios:
-                    key = max(keys_and_ratios, key=lambda item: item[1])[0]
-                    statement[item] = row[key]
-                else:
-                    statement[item] = None
+            items_map = items_maps.get(keys)
+            if items_map is None:
+                items_map = items_maps[keys] = self.MapItems(statement_name, keys)
+
+            for item, key in items_map.items():
+                statement[item] = row[key] if key is not None else None
 
             if statement_name == 'income_statement':
                 statement = self.CorrectIncomeStatement(statement)
@@ -202,17 +312,36 @@ class ItemStandardizer:
 
         return statements
 
-    def __call__(self, tables):
+    def ScoreTable(self, table):
 
-        statements_map = OrderedDict()
+        scores = []
         for statement_name in self.statement_names:
-            title_regex, statements_and_counts = self.title_regexes[statement_name], []
-            for table in tables:
-                if title_regex.search(table['title']):
-                    statements = self.ExtractStatements(statement_name, table)
-                    count = max(sum(value is not None for value in statement.values()) for statement in statements)
-                    statements_and_counts.append((statements, count))
+            if self.title_regexes[statement_name].search(table['title']):
+                statements = self.ExtractStatements(statement_name, table)
+                count = max(sum(value is not None for value in statement.values()) for statement in statements)
+                scores.append((statement_name, statements, count))
+
+        return scores
+
+    def HasGoodCandidates(self, candidates):
+
+        dates = []
+        for statement_name, statements_and_counts in candidates.items():
+            items, good_dates = self.item_regexes[statement_name].keys(), set()
+            for statements, count in statements_and_counts:
+                for statement in statements:
+                    ratio = sum(statement[item] is not None for item in items) / len(items)
+                    if ratio >= self.good_ratio:
+                        good_dates.add(statement['date'])
+
+            dates.append(good_dates)
 
+        return bool(set.intersection(*dates))
+
+    def SelectStatements(self, candidates):
+
+        statements_map = OrderedDict()
+        for statement_name, statements_and_counts in candidates.items():
             statements = max(statements_and_counts, key=lambda item: item[1])[0] if statements_and_counts else []
             statements_map[statement_name] = statements
 
@@ -223,4 +352,35 @@ class ItemStandardizer:
             statements = sorted(statements, key=lambda statement: statement['date'])
             statements_map[statement_name] = statements
 
-        return statements_map
\ No newline at end of file
+        return statements_map
+
+    def Stream(self, pages_tables, look_ahead=1):
+
+        candidates = OrderedDict((statement_name, []) for statement_name in self.statement_names)
+        remaining_pages = None
+        for page_tables in pages_tables:
+            for table in page_tables:
+                for statement_name, statements, count in self.ScoreTable(table):
+                    candidates[statement_name].append((statements, count))
+
+            if remaining_pages is None and self.HasGoodCandidates(candidates):
+                remaining_pages = look_ahead
+            elif remaining_pages is not None:
+                remaining_pages -= 1
+
+            if remaining_pages is not None and remaining_pages <= 0:
+                break
+
+        if hasattr(pages_tables, 'close'):
+            pages_tables.close()
+
+        return self.SelectStatements(candidates)
+
+    def __call__(self, tables):
+
+        candidates = OrderedDict((statement_name, []) for statement_name in self.statement_names)
+        for table in tables:
+            for statement_name, statements, count in self.ScoreTable(table):
+                candidates[statement_name].append((statements, count))
+
+        return self.SelectStatements(candidates)
\ No newline at end of file
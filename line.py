@@ -0,0 +1,15 @@
+class Line:
+
+    __slots__ = ['y0', 'y1', 'words', 'separators', 'text']
+
+    def __init__(self, y0, y1, words):
+
+        self.y0, self.y1, self.words = y0, y1, words
+        self.separators, self.text = [], None
+
+    def GetText(self):
+
+        if self.text is None:
+            self.text = ' '.join(word[-1] for word in self.words)
+
+        return self.text
\ No newline at end of file
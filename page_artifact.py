@@ -0,0 +1,30 @@
+import fitz
+
+class PageArtifact:
+
+    __slots__ = ['document', 'page_number', 'strip_images', 'html']
+
+    def __init__(self, document, page_number, strip_images=False):
+
+        self.document, self.page_number = document, page_number
+        self.strip_images, self.html = strip_images, None
+
+    def GetHtml(self):
+
+        if self.html is None:
+            page = self.document[self.page_number]
+            if self.strip_images:
+                self.html = page.get_text('html', flags=fitz.TEXTFLAGS_HTML & ~fitz.TEXT_PRESERVE_IMAGES)
+            else:
+                self.html = page.get_text('html')
+
+        return self.html
+
+    def __getstate__(self):
+
+        return self.page_number, self.strip_images, self.html
+
+    def __setstate__(self, state):
+
+        self.document = None
+        self.page_number, self.strip_images, self.html = state
\ No newline at end of file
@@ -0,0 +1,96 @@
+from datetime import datetime, timedelta
+from multi_processing import Value
+
+class RefreshScheduler:
+
+    def __init__(self, database, max_batch=100):
+
+        self.database = database
+        self.max_batch = max_batch
+        self.default_lags = {'FY': 90, 'H1': 60, 'H2': 90, 'Q1': 45, 'Q2': 45, 'Q3': 45, 'Q4': 60}
+        self.window = timedelta(days=30), timedelta(days=45)
+        self.intervals = {'window': timedelta(days=1), 'outside': timedelta(days=30), 'unknown': timedelta(days=7)}
+        self.crawl_times = Value('crawl_times', {})
+
+    def ParseDate(self, text, format):
+
+        try:
+            return datetime.strptime(text, format)
+        except (TypeError, ValueError):
+            return None
+
+    def AddYear(self, date):
+
+        try:
+            return date.replace(year=date.year + 1)
+        except ValueError:
+            return date.replace(year=date.year + 1, day=28)
+
+    def GetHistory(self):
+
+        history = {}
+        for symbol, fiscal_period, date, created_at, updated_at in self.database.GetReportingHistory():
+            date = self.ParseDate(date, '%Y-%m-%d')
+            created_at = self.ParseDate(created_at, '%Y-%m-%d %H:%M:%S')
+            updated_at = self.ParseDate(updated_at, '%Y-%m-%d %H:%M:%S')
+            if fiscal_period in self.default_lags and date is not None and updated_at is not None:
+                history.setdefault(symbol, []).append((fiscal_period, date, created_at, updated_at))
+
+        return history
+
+    def GetWindows(self, reports, time_now):
+
+        periods, created_times = {}, [report[2] for report in reports if report[2] is not None]
+        first_seen = min(created_times) if created_times else None
+        for fiscal_period, date, created_at, updated_at in reports:
+            periods.setdefault(fiscal_period, []).append((date, created_at))
+
+        windows = []
+        for fiscal_period, items in periods.items():
+            lags = [(created_at - date).days for date, created_at in items if created_at and first_seen < created_at and date < created_at]
+            lag = sorted(lags)[len(lags) // 2] if lags else self.default_lags[fiscal_period]
+            lag = timedelta(days=min(max(lag, 15), self.default_lags[fiscal_period] * 2))
+
+            next_date = self.AddYear(max(date for date, created_at in items))
+            while next_date + lag + self.window[1] < time_now:
+                next_date = self.AddYear(next_date)
+
+            publication_date = next_date + lag
+            windows.append((publication_date - self.window[0], publication_date + self.window[1]))
+
+        return windows
+
+    def GetDueCompanies(self, companies, time_now=None):
+
+        time_now = time_now or datetime.now()
+        history, crawl_times = self.GetHistory(), self.crawl_times.Get()
+
+        due_companies = []
+        for company in companies:
+            symbol, reports = company[0], history.get(company[0], [])
+            last_crawl_time = crawl_times.get(symbol)
+            if last_crawl_time is None and reports:
+                last_crawl_time = max(updated_at for fiscal_period, date, created_at, updated_at in reports)
+
+            windows = self.GetWindows(reports, time_now)
+            in_window = any(start <= time_now <= end for start, end in windows)
+            if in_window:
+                interval = self.intervals['window']
+            else:
+                interval = self.intervals['outside'] if reports else self.intervals['unknown']
+
+            overdue = time_now - last_crawl_time - interval if last_crawl_time else timedelta(days=365)
+            if overdue >= timedelta(0):
+                due_companies.append((not in_window, -overdue.total_seconds(), company))
+
+        due_companies = sorted(due_companies, key=lambda item: item[:2])
+        due_companies = [item[-1] for item in due_companies[:self.max_batch]]
+
+        return due_companies
+
+    def SetCrawlTime(self, symbol, time_now=None):
+
+        with self.crawl_times:
+            crawl_times = self.crawl_times.Get()
+            crawl_times[symbol] = time_now or datetime.now()
+            self.crawl_times.Set(crawl_times)
@@ -0,0 +1,167 @@
+import re
+import json
+import fitz
+import random
+
+class StatementGenerator:
+
+    def __init__(self, seed=0):
+
+        self.random = random.Random(seed)
+        self.statement_names = ['income_statement', 'balance_sheet_statement', 'cash_flow_statement']
+        self.language_regexes = [('no', r'ø|å|kontantstrøm|eiendel|egenkapital|gjeld|drift|årsresultat|^sum\s'),
+                                 ('nl', r'kasstroom|activa|passiva|omzet|opbrengst|resultaat|vermogen|winst|verlies|schulden|totaal|bedrijf'),
+                                 ('fr', r'[éèêàç]|flux|tr[ée]sorerie|chiffre|r[ée]sultat|actif|passif|capitaux|dettes|produits|charges|[ée]tat')]
+        self.captions = {'en': ['(in millions of euros)', '(in thousands of EUR)', 'EUR million', 'USD 000', '(in EUR thousands)'],
+                         'fr': ['(en millions d\'euros)', '(en milliers d\'euros)', 'en millions d’euros'],
+                         'nl': ['(in miljoen euro)', '(in duizend euro)'], 'no': ['(NOK million)', 'Beløp i NOK 1 000']}
+        self.months = {'en': ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+                              'November', 'December'],
+                       'fr': ['Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin', 'Juillet', 'Aout', 'Septembre', 'Octobre',
+                              'Novembre', 'Décembre']}
+        self.narrative_words = 'the group revenue increased during the year reflecting strong performance across all segments ' \
+                               'with net income growth of 12.3 million in 2022'.split()
+        self.structures = self.LoadStructures()
+
+    def GetLanguage(self, text):
+
+        for language, regex in self.language_regexes:
+            if re.search(regex, text, re.IGNORECASE):
+                return language
+
+        return 'en'
+
+    def LoadStructures(self):
+
+        path = 'data/structures.json'
+        with open(path, 'r', encoding='utf-8') as file:
+            structures = json.load(file)
+
+        languages = {}
+        for statement_name in self.statement_names:
+            structure = structures[statement_name]
+            for title in structure['titles']:
+                language = self.GetLanguage(title)
+                languages.setdefault(language, {}).setdefault(statement_name, {'titles': [], 'items': []})['titles'].append(title)
+
+            for item, names in structure['items'].items():
+                for name in names:
+                    language = self.GetLanguage(name)
+                    languages.setdefault(language, {}).setdefault(statement_name, {'titles': [], 'items': []})['items'].append(name)
+
+        for language, language_structures in languages.items():
+            for statement_name in self.statement_names:
+                structure = language_structures.setdefault(statement_name, {'titles': [], 'items': []})
+                structure['titles'] = structure['titles'] or languages['en'][statement_name]['titles']
+                structure['items'] = structure['items'] or languages['en'][statement_name]['items']
+
+        return languages
+
+    def GenerateNumber(self):
+
+        value = self.random.choice([self.random.randint(1, 999), self.random.randint(1000, 999999), self.random.randint(1, 99999) / 10])
+        if isinstance(value, float):
+            text = '%.1f' % value
+        else:
+            text = '{:,}'.format(value)
+            if self.random.random() < 0.3:
+                text = text.replace(',', '.')
+            elif self.random.random() < 0.2:
+                text = text.replace(',', ' ')
+
+        if self.random.random() < 0.25:
+            text = '(%s)' % text
+        elif self.random.random() < 0.05:
+            text = '-'
+
+        return text
+
+    def GenerateHeader(self, language, columns):
+
+        year, months = self.random.randint(2018, 2024), self.months.get(language, self.months['en'])
+        headers = [['31 %s %d' % (months[11], year - idx) for idx in range(columns)],
+                   ['%d' % (year - idx) for idx in range(columns)],
+                   ['H1 %d' % (year - idx) for idx in range(columns)],
+                   ['30/06/%d' % year] + ['31/12/%d' % (year - idx) for idx in range(1, columns)],
+                   ['%s 31, %d' % (months[11], year - idx) for idx in range(columns)],
+                   ['%d-12-31' % (year - idx) for idx in range(columns)]]
+
+        return self.random.choice(headers)
+
+    def AddStatementPage(self, document, statement_name, language, columns, captions, separators, overprint, rows, page_height,
+                         header_y=None):
+
+        page = document.new_page(width=595, height=page_height)
+        structure = self.structures[language][statement_name]
+        y = 60 + self.random.randint(0, 40)
+        if header_y is not None:
+            words = [word for word in self.narrative_words if not any(char.isdigit() for char in word)]
+            while y < header_y - 50:
+                text = ' '.join(self.random.choice(words) for _ in range(self.random.randint(6, 14)))
+                page.insert_text((50, y), text, fontsize=9)
+                y += 13
+            y = header_y - 36
+
+        title = self.random.choice(structure['titles'])
+        page.insert_text((50, y), title[0].upper() + title[1:], fontsize=13)
+        y += 20
+
+        if captions:
+            page.insert_text((50, y), self.random.choice(self.captions[language]), fontsize=8)
+            y += 16
+
+        xs = [330 + idx * 85 for idx in range(columns)]
+        for x, text in zip(xs, self.GenerateHeader(language, columns)):
+            page.insert_text((x, y), text, fontsize=8)
+        y += 14
+
+        for idx in range(rows or self.random.randint(8, 40)):
+            label = self.random.choice(structure['items'])
+            label = label[0].upper() + label[1:]
+            page.insert_text((50, y), label, fontsize=8)
+            if overprint:
+                page.insert_text((50.2, y), label, fontsize=8)
+
+            for x in xs:
+                text = self.GenerateNumber()
+                page.insert_text((x, y), text, fontsize=8)
+                if overprint:
+                    page.insert_text((x + 0.1, y), text, fontsize=8)
+
+            if separators and self.random.random() < 0.3:
+                page.draw_rect(fitz.Rect(45, y + 2, 560, y + 2.6), color=None, fill=(0, 0, 0), fill_opacity=1)
+            if separators and self.random.random() < 0.1:
+                for x in xs:
+                    page.draw_rect(fitz.Rect(x - 3, y - 8, x - 2.5, y + 2), color=None, fill=(0.2, 0.2, 0.2), fill_opacity=1)
+
+            y += self.random.choice([11, 12, 13])
+            if y > page_height - 40:
+                break
+
+        return page
+
+    def AddNarrativePage(self, document):
+
+        page = document.new_page(width=595, height=842)
+        y = 60
+        for idx in range(self.random.randint(20, 55)):
+            text = ' '.join(self.random.choice(self.narrative_words) for _ in range(self.random.randint(6, 14)))
+            page.insert_text((50, y), text, fontsize=9)
+            y += 13
+
+        return page
+
+    def __call__(self, pages=6, columns=2, languages=('en',), captions=True, separators=True, overprint=False,
+                 narrative=0.3, rows=None, page_height=842, header_y=None):
+
+        document = fitz.open()
+        for idx in range(pages):
+            if self.random.random() < narrative:
+                self.AddNarrativePage(document)
+            else:
+                statement_name = self.statement_names[idx % len(self.statement_names)]
+                language = self.random.choice(languages)
+                self.AddStatementPage(document, statement_name, language, columns, captions, separators, overprint, rows, page_height,
+                                      header_y)
+
+        return document.tobytes()
\ No newline at end of file
@@ -0,0 +1,8 @@
+class Table:
+
+    __slots__ = ['first_idx', 'header_idx', 'last_idx', 'header_rows', 'rows', 'cell_flags', 'title']
+
+    def __init__(self, first_idx, last_idx, rows):
+
+        self.first_idx, self.header_idx, self.last_idx = first_idx, first_idx, last_idx
+        self.header_rows, self.rows, self.cell_flags, self.title = [], rows, None, []
\ No newline at end of file
@@ -0,0 +1,28 @@
+class TableBuilder:
+
+    def __init__(self, idx, blocks):
+
+        self.first_idx, self.last_idx = idx, idx
+        self.rows, self.alignments = [blocks], [(None, None)]
+        self.most_blocks, self.most_gaps = blocks, self.GetGaps(blocks)
+
+    def GetGaps(self, blocks):
+
+        return [(block[1], next_block[0]) for block, next_block in zip(blocks, blocks[1:])]
+
+    def Add(self, idx, blocks, aligned_blocks):
+
+        self.rows.append(blocks)
+        self.alignments.append((self.most_blocks, aligned_blocks))
+        self.last_idx = idx
+
+        if len(blocks) > len(self.most_blocks):
+            self.most_blocks, self.most_gaps = blocks, self.GetGaps(blocks)
+
+    def GetAlignment(self, row_idx, most_blocks):
+
+        aligned_to, aligned_blocks = self.alignments[row_idx]
+        if aligned_to is most_blocks:
+            return aligned_blocks
+
+        return None
\ No newline at end of file
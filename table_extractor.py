@@ -1,13 +1,22 @@
 import re
+import os
 import fitz
-import unicodedata
+import bisect
+import numpy as np
 from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
-from dateutil import parser
+from page_artifact import PageArtifact
+from text_layer_cache import TextLayerCache
+from table_builder import TableBuilder
+from table import Table
+from line import Line
 
 class TableExtractor:
 
-    def __init__(self):
+    worker_extractor, worker_document, worker_document_key = None, None, None
+
+    def __init__(self, page_threshold=0.35, workers=None, strip_images=False, clip_regions=False, cache_text=False):
 
         self.units_map = {'€': 'EUR', 'eur': 'EUR', 'euro': 'EUR', 'euros': 'EUR', 'd\'euros': 'EUR', 'd´euros': 'EUR', 
                           'd’euros': 'EUR', 'd‘euros': 'EUR', '$': 'USD', 'us$': 'USD', 'usd': 'USD', 'dollar': 'USD', 
@@ -19,7 +28,34 @@ class TableExtractor:
                                 'thousands': 1e3, 'millier': 1e3, 'milliers': 1e3, 'mille': 1e3, 'duizend': 1e3, 'tusen': 1e3, 
                                 'tusenvis': 1e3, 'k': 1e3, '\'000': 1e3, '´000': 1e3, '’000': 1e3, '‘000': 1e3, '1,000': 1e3, 
                                 '1 000': 1e3, '1000': 1e3, '000': 1e3}
-        self.date_regex, self.units_regex, self.parser_info = self.CreateRegexes()
+        self.date_regex, self.units_regex, self.months_map = self.CreateRegexes()
+        self.date_formats = self.CreateDateFormats()
+        self.date_cache, self.date_cache_size = OrderedDict(), 4096
+        self.repeating_numbers_regex = re.compile(r'[SHQ]\d\s+20\d(\d)(\1+)', re.IGNORECASE)
+        self.whitespace_regex = re.compile(r'\s+')
+        self.per_share_regex = re.compile(r'(?:per|par)\s+(share|action)', re.IGNORECASE)
+        self.number_regexes = [re.compile(r'\s+|\+'), re.compile(r'\([\d.,]+\)'), re.compile(r'[,.](?=\d{3})')]
+        self.private_use_regex = re.compile('[\ue000-\uf8ff\U000f0000-\U000ffffd\U00100000-\U0010fffd]')
+        self.numeric_token_regex = re.compile(r'^[(\-+]?\d[\d.,]*\)?%?$')
+        self.page_threshold, self.skipped_pages = page_threshold, 0
+        self.workers, self.min_parallel_pages = workers, 12
+        self.strip_images, self.max_header_lines = strip_images, 50
+        self.sentence_regex = re.compile(r'^.+[.:]\s*$')
+        self.half_year_regex = re.compile(r'(?:1st|first|2nd|second)\s+half[-\s]+year', re.IGNORECASE)
+        self.clip_regions, self.clipped_words = clip_regions, 0
+        self.min_column_rows, self.region_gap, self.region_margin = 3, 30, 80
+        self.text_layer_cache = TextLayerCache() if cache_text else None
+        self.empty_flag, self.number_flag, self.date_flag, self.letters_flag = 1, 2, 4, 8
+        self.value_flag = 16
+        self.cell_cache, self.cell_cache_size = {}, 8192
+        self.numbers_regex = re.compile(r'^[\s\d.,\-+%()]+$')
+        self.number_gaps_regex = re.compile(r'(?<=\b\d)\s(?=\d\/)')
+        self.letters_regex = re.compile(r'[A-Za-z]')
+        units_names = [units.lower() for units in self.units_map.keys()]
+        units_tokens = [units for units in units_names if not any(other != units and other in units for other in units_names)]
+        self.units_tokens_regex = re.compile('|'.join(re.escape(units) for units in units_tokens))
+        self.casefold_regex = re.compile('[İıſ]')
+        self.uppercase_bytes = bytes(range(ord('A'), ord('Z') + 1))
         fitz.TOOLS.mupdf_display_errors(False)
 
     def CreateRegexes(self):
@@ -28,8 +64,7 @@ class TableExtractor:
                        'November', 'December', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 
                        'Nov', 'Dec', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin', 'Juillet', 'Aout', 'Septembre', 
                        'Octobre', 'Novembre', 'Décembre']
-        class ParserInfo(parser.parserinfo):
-            MONTHS = list(zip(month_names[:12], month_names[12:24], month_names[24:]))
+        months_map = {name.lower(): idx % 12 + 1 for idx, name in enumerate(month_names)}
 
         month_names = '|'.join(month_names)
         date_regexes = ['(?:1er|2[eè]me)\s+semestre\s+20\d{2}', '20\d{2}\s+(?:1er|2[eè]me)\s+semestre', 
@@ -47,81 +82,110 @@ class TableExtractor:
                       % (multipliers, units, units, multipliers, units)
         units_regex = re.compile(units_regex, re.IGNORECASE)
 
-        return date_regex, units_regex, ParserInfo()
+        return date_regex, units_regex, months_map
 
-    def MergeLines(self, lines):
+    def CreateDateFormats(self):
 
-        idx = 1
-        while idx < len(lines):
-            prev_y0, prev_y1, prev_words = lines[idx - 1]
-            y0, y1, words = lines[idx]
-            line_height = ((prev_y1 - prev_y0) + (y1 - y0)) / 2
-            overlap_ratio = (prev_y1 - y0) / line_height if line_height else 0.0
+        month_names = '|'.join(re.escape(name) for name in self.months_map.keys())
+        date_formats = [('ymd', r'(\d{4})[\/.-](\d{1,2})[\/.-](\d{1,2})'), ('mdy', r'(\d{1,2})[\/.-](\d{1,2})[\/.-](\d{4})'), 
+                        ('mdy', r'(\d{1,2})\/(\d{1,2})\/(\d{2})'), ('dby', r'(\d{2})[\s,]+(%s)[\s,]+(\d{4})' % month_names), 
+                        ('bdy', r'(%s)[\s,]+(\d{2})[\s,]+(\d{4})' % month_names), ('ybd', r'(\d{4})[\s,]+(%s)[\s,]+(\d{2})' % month_names)]
+        date_formats = [(order, re.compile(regex, re.IGNORECASE)) for order, regex in date_formats]
 
-            if prev_y0 <= y0 and y1 <= prev_y1 or overlap_ratio > 0.5:
-                prev_y0, prev_y1 = min(prev_y0, y0), max(prev_y1, y1)
-                lines[idx - 1] = [prev_y0, prev_y1, prev_words + words]
-                lines.pop(idx)
-            else:
-                idx += 1
+        return date_formats
 
-        for idx, line in enumerate(lines):
-            y0, y1, words = line
-            words = sorted(set(words), key=lambda word: word[0])
-            lines[idx] = [y0, y1, words]
+    def MergeLines(self, keys):
 
-        return lines
+        merged_keys, line_ids = [], np.empty(len(keys), dtype=np.int64)
+        prev_y0, prev_y1 = keys[0]
+        for idx, (y0, y1) in enumerate(keys):
+            if idx > 0:
+                line_height = ((prev_y1 - prev_y0) + (y1 - y0)) / 2
+                overlap_ratio = (prev_y1 - y0) / line_height if line_height else 0.0
+
+                if prev_y0 <= y0 and y1 <= prev_y1 or overlap_ratio > 0.5:
+                    prev_y0, prev_y1 = min(prev_y0, y0), max(prev_y1, y1)
+                else:
+                    merged_keys.append((prev_y0, prev_y1))
+                    prev_y0, prev_y1 = y0, y1
+
+            line_ids[idx] = len(merged_keys)
+
+        merged_keys.append((prev_y0, prev_y1))
+        return merged_keys, line_ids
+
+    def RemoveDuplicateWords(self, words):
+
+        positions = {}
+        for idx, word in enumerate(words):
+            positions.setdefault(word[2], []).append(idx)
+
+        removed_indices = set()
+        for indices in positions.values():
+            for position, idx in enumerate(indices):
+                if idx in removed_indices:
+                    continue
+
+                x0, x1, text = words[idx]
+                if x1 - x0 <= 0:
+                    continue
+
+                for other_idx in indices[position + 1:]:
+                    other_x0, other_x1, other_text = words[other_idx]
+                    if other_x0 >= x1:
+                        break
+
+                    overlap = max(0, min(x1, other_x1) - other_x0)
+                    if overlap / (x1 - x0) > 0.9:
+                        removed_indices.add(other_idx)
+
+        return [word for idx, word in enumerate(words) if idx not in removed_indices]
+
+    def RemovePrefixWords(self, words):
+
+        word_idx = 0
+        while word_idx < len(words):
+            x0, x1, text = words[word_idx]
+            other_words = words[word_idx + 1:]
+
+            word_indices = set()
+            for other_word_idx, other_word in enumerate(other_words):
+                other_x0, other_x1, other_text = other_word
+                if x0 == other_x0:
+                    if text.startswith(other_text):
+                        word_indices.add(word_idx + 1 + other_word_idx)
+                    elif other_text.startswith(text):
+                        word_indices.add(word_idx)
+
+            words = [word for word_idx, word in enumerate(words) if word_idx not in word_indices]
+            word_idx += 1
+
+        return words
 
     def RemoveOverlappingWords(self, lines):
 
-        for line_idx, line in enumerate(lines):
-            y0, y1, words = line
-            word_idx = 0
-            
-            while word_idx < len(words):
-                x0, x1, text = words[word_idx]
-                other_words = words[word_idx + 1:]
-
-                word_indices = set()
-                for other_word_idx, other_word in enumerate(other_words):
-                    other_x0, other_x1, other_text = other_word
-                    if text == other_text:
-                        max_x0, min_x1 = max(x0, other_x0), min(x1, other_x1)
-                        overlap = max(0, min_x1 - max_x0)
-                        overlap_ratio = overlap / (x1 - x0) if x1 - x0 else 0.0
-                        if overlap_ratio > 0.9:
-                            word_indices.add(word_idx + 1 + other_word_idx)
-
-                words = [word for word_idx, word in enumerate(words) if word_idx not in word_indices]
-                word_idx += 1
-
-            word_idx = 0
-            while word_idx < len(words):
-                x0, x1, text = words[word_idx]
-                other_words = words[word_idx + 1:]
+        for line in lines:
+            words = self.RemoveDuplicateWords(line.words)
 
-                word_indices = set()
-                for other_word_idx, other_word in enumerate(other_words):
-                    other_x0, other_x1, other_text = other_word
-                    if x0 == other_x0:
-                        if text.startswith(other_text):
-                            word_indices.add(word_idx + 1 + other_word_idx)
-                        elif other_text.startswith(text):
-                            word_indices.add(word_idx)
+            new_words, start_idx = [], 0
+            while start_idx < len(words):
+                end_idx = start_idx + 1
+                while end_idx < len(words) and words[end_idx][0] == words[start_idx][0]:
+                    end_idx += 1
 
-                words = [word for word_idx, word in enumerate(words) if word_idx not in word_indices]
-                word_idx += 1
+                run = words[start_idx:end_idx]
+                new_words.extend(run if len(run) == 1 else self.RemovePrefixWords(run))
+                start_idx = end_idx
 
-            lines[line_idx] = [y0, y1, words]
+            line.words = new_words
 
         return lines
 
     def MergeWords(self, lines):
 
         number_regex = re.compile('^[\d.,]+')
-        for line_idx, line in enumerate(lines):
-            y0, y1, words = line
-            word_idx = 1
+        for line in lines:
+            words, word_idx = line.words, 1
 
             while word_idx < len(words):
                 prev_x0, prev_x1, prev_text = words[word_idx - 1]
@@ -132,65 +196,219 @@ class TableExtractor:
                 else:
                     word_idx += 1
 
-            lines[line_idx] = [y0, y1, words]
-
         return lines 
 
-    def ExtractSeparators(self, page, lines):
+    def ExtractRects(self, page):
 
         paths, rects = page.get_drawings(), []
         for path in paths:
-            fill_opacity, rect = path['fill_opacity'], path['rect']
+            fill_opacity, rect = path.get('fill_opacity') or 0, path['rect']
             if fill_opacity > 0.9:
                 rects.append(rect)
 
-        for idx, line in enumerate(lines):
-            y0, y1, words = line
-            line_height, separators = y1 - y0, []
+        return rects
+
+    def IndexRects(self, rects, bucket_height=10):
+
+        buckets = {}
+        for idx, rect in enumerate(rects):
+            first_bucket, last_bucket = int(rect.y0 // bucket_height), int(rect.y1 // bucket_height)
+            for bucket in range(first_bucket, last_bucket + 1):
+                buckets.setdefault(bucket, []).append(idx)
+
+        return buckets
+
+    def HasTableCandidates(self, lines):
+
+        for line in lines:
+            text = line.GetText()
+            if self.date_regex.search(text) or self.repeating_numbers_regex.search(text):
+                return True
+
+        return False
+
+    def ExtractSeparators(self, page, lines, rects=None, document_key=None, bucket_height=10):
+
+        if not self.HasTableCandidates(lines):
+            rects = []
+        elif rects is None:
+            rects = self.GetRects(page, document_key)
+        buckets = self.IndexRects(rects, bucket_height) if rects else {}
 
-            for rect in rects:
-                max_y0, min_y1 = max(y0, rect.y0), min(y1, rect.y1)
-                overlap = max(0, min_y1 - max_y0)
-                overlap_ratio = overlap / line_height if line_height else 0
-                if overlap_ratio > 0.66:
-                    separators.append(rect.x0)
-                    separators.append(rect.x1)
+        for line in lines:
+            y0, y1 = line.y0, line.y1
+            line_height, separators = y1 - y0, []
 
-            lines[idx] = words, separators
+            if buckets and line_height > 0:
+                first_bucket, last_bucket = int(y0 // bucket_height), int(y1 // bucket_height)
+                rect_indices = set()
+                for bucket in range(first_bucket, last_bucket + 1):
+                    rect_indices.update(buckets.get(bucket, []))
+
+                for rect_idx in sorted(rect_indices):
+                    rect = rects[rect_idx]
+                    max_y0, min_y1 = max(y0, rect.y0), min(y1, rect.y1)
+                    overlap = max(0, min_y1 - max_y0)
+                    if overlap / line_height > 0.66:
+                        separators.append(rect.x0)
+                        separators.append(rect.x1)
+
+            line.separators = sorted(separators)
         
         return lines
 
-    def ExtractLines(self, page):
+    def NormalizeText(self, text):
+
+        text = self.whitespace_regex.sub(' ', text)
+        if not text.isascii():
+            text = self.private_use_regex.sub('', text)
+
+        return text
+
+    def ScorePage(self, page, words):
+
+        rows = {}
+        for word in words:
+            rows.setdefault(round(word[3]), []).append(word)
+
+        first_date_y, last_numeric_y = None, None
+        numeric_count, numeric_rows = 0, 0
+        for y1, row in rows.items():
+            text = ' '.join(word[4] for word in row)
+            if self.date_regex.search(text) or self.repeating_numbers_regex.search(text):
+                first_date_y = y1 if first_date_y is None else min(first_date_y, y1)
+
+            row = sorted(row, key=lambda word: word[0])
+            has_column_gap = False
+            for prev_word, word in zip([None] + row[:-1], row):
+                if self.numeric_token_regex.search(word[4]):
+                    numeric_count += 1
+                    has_column_gap = has_column_gap or (prev_word is not None and word[0] - prev_word[2] > 10)
+
+            if has_column_gap:
+                numeric_rows += 1
+                last_numeric_y = y1 if last_numeric_y is None else max(last_numeric_y, y1)
+
+        if first_date_y is None:
+            return 0.0
+
+        numeric_density = numeric_count / len(words)
+        date_above_numbers = last_numeric_y is not None and first_date_y < last_numeric_y
+        score = 0.3 * min(1.0, numeric_density / 0.3) + 0.2 * date_above_numbers + 0.5 * min(1.0, numeric_rows / 5)
+
+        return score
 
-        whitespace_regex = re.compile(r'\s+')
-        lines, words = {}, page.get_text('words')
+    def ExtractColumnEdges(self, words):
 
+        edge_counts = {}
         for word in words:
-            x0, y0, x1, y1, text = word[:5]
-            text = whitespace_regex.sub(' ', text)
-            text = ''.join(char for char in text if unicodedata.category(char) != 'Co')
-            if not text:
+            for edge in (round(word[0] / 5), -round(word[2] / 5) - 1):
+                edge_counts[edge] = edge_counts.get(edge, 0) + 1
+
+        column_edges = set()
+        for edge in edge_counts:
+            if sum(edge_counts.get(edge + offset, 0) for offset in (-1, 0, 1)) >= self.min_column_rows:
+                column_edges.update((edge - 1, edge, edge + 1))
+
+        return column_edges
+
+    def ExtractRegions(self, page, words, rects):
+
+        rows, numeric_words = {}, []
+        for word in words:
+            rows.setdefault(round(word[3]), []).append(word)
+
+        for row in rows.values():
+            row.sort(key=lambda word: word[0])
+            for prev_word, word in zip(row, row[1:]):
+                if word[0] - prev_word[2] > 10 and self.numeric_token_regex.search(word[4]):
+                    numeric_words.append(word)
+
+        column_edges = self.ExtractColumnEdges(numeric_words)
+        column_spans = [(word[1], word[3]) for word in numeric_words
+                        if round(word[0] / 5) in column_edges or -round(word[2] / 5) - 1 in column_edges]
+        if not column_spans:
+            return []
+
+        rect_spans = [(rect.y0, rect.y1) for rect in rects]
+        regions = []
+        for y0, y1 in sorted(column_spans + rect_spans):
+            if regions and y0 - regions[-1][1] < self.region_gap:
+                regions[-1][1] = max(regions[-1][1], y1)
+            else:
+                regions.append([y0, y1])
+
+        column_y0s, page_rect, clip_rects = sorted(y0 for y0, y1 in column_spans), page.rect, []
+        for y0, y1 in regions:
+            if bisect.bisect_right(column_y0s, y1) == bisect.bisect_left(column_y0s, y0):
                 continue
 
-            key = round(y0, 1), round(y1, 1)
-            word = round(x0, 1), round(x1, 1), text
-            if key in lines:
-                lines[key].append(word)
+            y0, y1 = max(page_rect.y0, y0 - self.region_margin), y1 + self.region_gap
+            if clip_rects and y0 <= clip_rects[-1].y1:
+                clip_rects[-1].y1 = max(clip_rects[-1].y1, y1)
             else:
-                lines[key] = [word]
+                clip_rects.append(fitz.Rect(page_rect.x0, y0, page_rect.x1, y1))
+
+        return clip_rects
+
+    def ClipWords(self, page, words, rects):
+
+        regions = self.ExtractRegions(page, words, rects)
+        if not regions:
+            return words, 0
+
+        region_y0s, clipped_words = [region.y0 for region in regions], []
+        for word in words:
+            y = (word[1] + word[3]) / 2
+            region_idx = bisect.bisect_right(region_y0s, y) - 1
+            if region_idx >= 0 and y <= regions[region_idx].y1:
+                clipped_words.append(word)
+
+        return clipped_words, len(words) - len(clipped_words)
+
+    def ExtractLines(self, page, words=None, rects=None, document_key=None):
+
+        words = page.get_text('words') if words is None else words
+        texts = [self.NormalizeText(word[4]) for word in words]
+        indices = [idx for idx, text in enumerate(texts) if text]
+        if not indices:
+            return self.ExtractSeparators(page, [], rects, document_key)
+
+        texts = [texts[idx] for idx in indices]
+        boxes = np.array([words[idx][:4] for idx in indices], dtype=np.float64).round(1)
+        x0, y0, x1, y1 = boxes.T
+
+        keys, first_indices, key_ids = np.unique(boxes[:, [1, 3]], axis=0, return_index=True, return_inverse=True)
+        key_ids = key_ids.reshape(-1)
+        key_order = np.lexsort((first_indices, keys[:, 0]))
+        key_ranks = np.empty(len(key_order), dtype=np.int64)
+        key_ranks[key_order] = np.arange(len(key_order))
+
+        merged_keys, line_ids = self.MergeLines(keys[key_order].tolist())
+        word_ranks = key_ranks[key_ids]
+        word_line_ids = line_ids[word_ranks]
+        word_order = np.lexsort((np.arange(len(texts)), word_ranks, x0, word_line_ids))
+
+        coordinates, coordinate_ids = np.unique(np.concatenate([x0, x1]), return_inverse=True)
+        coordinates, coordinate_ids = coordinates.tolist(), coordinate_ids.reshape(-1).tolist()
+        x0, x1 = [coordinates[idx] for idx in coordinate_ids[:len(texts)]], [coordinates[idx] for idx in coordinate_ids[len(texts):]]
+        lines = [Line(y0, y1, []) for y0, y1 in merged_keys]
+        seen_words = [set() for line in lines]
+        for idx, line_idx in zip(word_order.tolist(), word_line_ids[word_order].tolist()):
+            word = x0[idx], x1[idx], texts[idx]
+            if word not in seen_words[line_idx]:
+                seen_words[line_idx].add(word)
+                lines[line_idx].words.append(word)
 
-        lines = [[*key, value] for key, value in lines.items()]
-        lines = sorted(lines, key=lambda line: line[0])
-        lines = self.MergeLines(lines)
         lines = self.RemoveOverlappingWords(lines)
         lines = self.MergeWords(lines)
-        lines = self.ExtractSeparators(page, lines)
+        lines = self.ExtractSeparators(page, lines, rects, document_key)
 
         return lines
 
     def ExtractBlocks(self, line):
 
-        words, separators = line
+        words, separators = line.words, line.separators
         text_length, char_count = 0, 0
         for x0, x1, text in words:
             text_length += x1 - x0
@@ -207,7 +425,8 @@ class TableExtractor:
             else:
                 next_word = words[idx + 1] 
                 gap = next_word[0] - word[1]
-                has_separator = any(word[1] < separator < next_word[0] for separator in separators)
+                separator_idx = bisect.bisect_right(separators, word[1])
+                has_separator = separator_idx < len(separators) and separators[separator_idx] < next_word[0]
 
             if gap > double_char_width or has_separator:
                 groups.append([])
@@ -289,10 +508,11 @@ class TableExtractor:
 
         return aligned_blocks
 
-    def AlignBlocks(self, blocks, other_blocks):
+    def AlignBlocks(self, blocks, other_blocks, other_block_gaps=None):
 
         block_gaps = [(block[1], next_block[0]) for block, next_block in zip(blocks, blocks[1:])]
-        other_block_gaps = [(block[1], next_block[0]) for block, next_block in zip(other_blocks, other_blocks[1:])]
+        if other_block_gaps is None:
+            other_block_gaps = [(block[1], next_block[0]) for block, next_block in zip(other_blocks, other_blocks[1:])]
 
         if len(blocks) <= len(other_blocks):
             less_blocks, more_blocks = blocks, other_blocks
@@ -310,8 +530,7 @@ class TableExtractor:
 
         x0, x1 = blocks[0][0], blocks[-1][1]
         text = ''.join(block[-1] for block in blocks)
-        regex = re.compile(r'(?:1st|first|2nd|second)\s+half[-\s]+year', re.IGNORECASE)
-        boundaries = [match.span() for match in regex.finditer(text)]
+        boundaries = [match.span() for match in self.half_year_regex.finditer(text)]
         if not boundaries:
             return blocks
 
@@ -336,24 +555,22 @@ class TableExtractor:
 
         return blocks
 
-    def CorrectTable(self, table, first_idx, lines):
+    def CorrectTable(self, builder, line_blocks):
 
-        lines = lines[:first_idx][::-1]
-        most_blocks = max(table, key=lambda item: len(item))
-        prev_aligned_blocks = self.AlignBlocks(table[0], most_blocks)
+        table, first_idx = builder.rows, builder.first_idx
+        most_blocks, most_gaps = builder.most_blocks, builder.most_gaps
+        prev_aligned_blocks = self.AlignBlocks(table[0], most_blocks, most_gaps)
         prev_aligned_blocks = prev_aligned_blocks or [None] * len(most_blocks)
-        sentence_regex = re.compile(r'^.+[.:]\s*$')
 
         table_extension = []
-        for line in lines:
-            blocks = self.ExtractBlocks(line)
-            blocks = self.CorrectBlocks(blocks, most_blocks)
-            aligned_blocks = self.AlignBlocks(blocks, most_blocks)
+        for line_idx in range(first_idx - 1, max(first_idx - 1 - self.max_header_lines, -1), -1):
+            blocks = self.CorrectBlocks(line_blocks[line_idx], most_blocks)
+            aligned_blocks = self.AlignBlocks(blocks, most_blocks, most_gaps)
 
             if aligned_blocks is None or len(aligned_blocks) != len(prev_aligned_blocks):
                 line_valid = False
             else:
-                is_sentence = aligned_blocks[0] is not None and bool(sentence_regex.search(aligned_blocks[0][-1]))
+                is_sentence = aligned_blocks[0] is not None and bool(self.sentence_regex.search(aligned_blocks[0][-1]))
                 other_blocks_empty = all(aligned_block is None for aligned_block in aligned_blocks[1:])
                 if is_sentence and other_blocks_empty:
                     line_valid = False
@@ -379,181 +596,310 @@ class TableExtractor:
             else:
                 break
 
-        return table_extension[::-1] + table, first_idx
+        return table_extension[::-1], first_idx
 
     def ExtractTables(self, lines):
 
-        tables = [[]]
+        line_blocks, builders, builder = [], [], None
         for idx, line in enumerate(lines):
             blocks = self.ExtractBlocks(line)
-            if tables[-1]:
-                most_blocks = max((item[-1] for item in tables[-1]), key=lambda item: len(item))
-                aligned_blocks = self.AlignBlocks(blocks, most_blocks)
-                if aligned_blocks is None:
-                    tables.append([[idx, blocks]] if len(blocks) > 1 else [])
-                else:
-                    tables[-1].append([idx, blocks])
+            line_blocks.append(blocks)
+            aligned_blocks = None
+            if builder is not None:
+                aligned_blocks = self.AlignBlocks(blocks, builder.most_blocks, builder.most_gaps)
 
+            if aligned_blocks is not None:
+                builder.Add(idx, blocks, aligned_blocks)
             elif len(blocks) > 1:
-                tables[-1].append([idx, blocks])
+                builder = TableBuilder(idx, blocks)
+                builders.append(builder)
+            else:
+                builder = None
 
-        tables = tables if tables[-1] else tables[:-1]       
-        for table_idx, table in enumerate(tables):
-            first_idx, last_idx = table[0][0], table[-1][0]
-            table = [item[-1] for item in table]
-            table, first_idx = self.CorrectTable(table, first_idx, lines)
-
-            most_blocks = max(table, key=lambda item: len(item))
-            for row_idx, blocks in enumerate(table):
-                blocks = self.AlignBlocks(blocks, most_blocks)
-                if blocks is None:
+        tables = []
+        for builder in builders:
+            table_extension, first_idx = self.CorrectTable(builder, line_blocks)
+            most_blocks, most_gaps = builder.most_blocks, builder.most_gaps
+            for blocks in table_extension:
+                if len(blocks) >= len(most_blocks):
+                    most_blocks, most_gaps = blocks, builder.GetGaps(blocks)
+                    break
+
+            table = []
+            for row_idx, blocks in enumerate(table_extension + builder.rows):
+                row_idx -= len(table_extension)
+                aligned_blocks = builder.GetAlignment(row_idx, most_blocks) if row_idx >= 0 else None
+                if aligned_blocks is None:
+                    aligned_blocks = self.AlignBlocks(blocks, most_blocks, most_gaps)
+
+                if aligned_blocks is None:
                     row = [''] * len(most_blocks)
                 else:
-                    row = ['' if block is None else block[-1] for block in blocks]
+                    row = ['' if block is None else block[-1] for block in aligned_blocks]
 
-                table[row_idx] = row
+                table.append(row)
 
-            tables[table_idx] = [first_idx, last_idx, table]
+            tables.append(Table(first_idx, builder.last_idx, table))
 
         return tables
 
-    def FilterTables(self, tables):
+    def MayHaveUnits(self, cell):
 
-        numbers_regex = re.compile(r'^[\s\d.,\-+%()]+$')
-        number_gaps_regex = re.compile(r'(?<=\b\d)\s(?=\d\/)')
-        repeating_numbers_regex = re.compile(r'[SHQ]\d\s+20\d(\d)(\1+)', re.IGNORECASE)
-        ellipsis_regex = re.compile(r'[\d\s.,]+$')
+        return bool(self.units_tokens_regex.search(cell.lower()) or self.casefold_regex.search(cell))
+
+    def HasUnits(self, cells):
+
+        return any(self.MayHaveUnits(cell) and self.units_regex.search(cell) for cell in cells)
+
+    def CreateTextFlags(self, cell):
+
+        flags = 0
+        if cell.strip().lower() in ('-', 'n.a'):
+            flags |= self.value_flag
+        if ('20' in cell or '/' in cell) and self.date_regex.search(cell):
+            flags |= self.date_flag
+        if self.letters_regex.search(cell):
+            flags |= self.letters_flag
+
+        return flags
+
+    def IsUppercase(self, cell):
+
+        if not cell:
+            return False
+
+        if cell.isascii():
+            uppercase_count = len(cell) - len(cell.encode().translate(None, self.uppercase_bytes))
+        else:
+            uppercase_count = sum(map(str.isupper, cell))
+
+        return uppercase_count / len(cell) >= 0.5
+
+    def ClassifyCell(self, cell):
+
+        flags = self.cell_cache.get(cell)
+        if flags is not None:
+            return flags
+
+        if not cell:
+            flags = self.empty_flag | self.value_flag
+        elif self.numbers_regex.search(cell):
+            flags = self.number_flag | self.value_flag
+            if ('20' in cell or '/' in cell) and self.date_regex.search(cell):
+                flags |= self.date_flag
+        else:
+            flags = self.CreateTextFlags(cell)
+
+        if len(self.cell_cache) >= self.cell_cache_size:
+            self.cell_cache.clear()
+        self.cell_cache[cell] = flags
+
+        return flags
+
+    def ClassifyCells(self, cells):
+
+        return [self.ClassifyCell(cell) for cell in cells]
+
+    def CleanCells(self, cells):
+
+        number_gaps_regex, repeating_numbers_regex = self.number_gaps_regex, self.repeating_numbers_regex
         substitution = lambda match: match.string.replace(match.group(2), '')
 
+        numbers_search, date_search = self.numbers_regex.search, self.date_regex.search
+        number_flags = self.number_flag | self.value_flag
+
+        cleaned_cells, cells_flags = [], []
+        for cell in cells:
+            if cell and '/' not in cell and numbers_search(cell):
+                flags = number_flags | self.date_flag if '20' in cell and date_search(cell) else number_flags
+            else:
+                cell = repeating_numbers_regex.sub(substitution, number_gaps_regex.sub('', cell))
+                flags = self.ClassifyCell(cell)
+
+            cleaned_cells.append(cell)
+            cells_flags.append(flags)
+
+        return cleaned_cells, cells_flags
+
+    def FilterTables(self, tables):
+
+        ellipsis_regex = re.compile(r'[\d\s.,]+$')
         filtered_tables = []
-        for first_idx, last_idx, rows in tables:
+        for table in tables:
+            rows = table.rows
             if len(rows) < 3:
                 continue
 
             columns = [list(column) for column in zip(*rows)]
-            columns, other_columns = columns[:1], columns[1:]
+            columns, other_columns, columns_flags = columns[:1], columns[1:], []
             for column in other_columns:
-                column = [repeating_numbers_regex.sub(substitution, number_gaps_regex.sub('', cell)) for cell in column]
-                first_third_of_column = column[:len(column) // 3]
-                date_idx = next((idx for idx, cell in enumerate(first_third_of_column) if self.date_regex.search(cell)), -1)
-                if date_idx != -1:
-                    number_idx = next((idx for idx, cell in enumerate(column[date_idx + 1:]) if numbers_regex.search(cell)), -1)
-                    if number_idx != -1:
-                        columns.append(column)
+                first_third_of_column, first_third_flags = self.CleanCells(column[:len(column) // 3])
+                date_idx = next((idx for idx, flags in enumerate(first_third_flags) if flags & self.date_flag), -1)
+                if date_idx == -1:
+                    continue
+
+                column, column_flags = self.CleanCells(column[len(column) // 3:])
+                column, column_flags = first_third_of_column + column, first_third_flags + column_flags
+                if any(flags & self.number_flag for flags in column_flags[date_idx + 1:]):
+                    columns.append(column)
+                    columns_flags.append(column_flags)
 
             if len(columns) > 1:
                 columns = columns[:4]
                 columns[0] = [ellipsis_regex.sub('', cell) for cell in columns[0]]
-                rows = [list(row) for row in zip(*columns)]
-                filtered_tables.append([first_idx, last_idx, rows])
+                table.rows = [list(row) for row in zip(*columns)]
+                table.cell_flags = list(zip(self.ClassifyCells(columns[0]), *columns_flags[:3]))
+                filtered_tables.append(table)
 
         return filtered_tables
 
     def IdentifyHeader(self, tables):
 
-        letters_regex = re.compile(r'[A-Za-z]')
-        values_regex = re.compile(r'^[\s\d.,\-+%()]+$|^\s*(?:-|n\.a)?\s*$', re.IGNORECASE)
-
         new_tables = []
         for table in tables:
-            first_idx, last_idx, rows = table
-            date_idx = next(idx for idx, row in enumerate(rows) if self.date_regex.search(' '.join(row[1:])))
+            rows, rows_flags = table.rows, table.cell_flags
+            for date_idx, flags in enumerate(rows_flags):
+                if any(cell_flags & self.date_flag for cell_flags in flags[1:]):
+                    break
 
             header_idx = date_idx
-            for row in rows[date_idx + 1:]:
-                has_letters = bool(letters_regex.search(row[0]))
-                has_units = bool(self.units_regex.search(row[0])) or bool(self.units_regex.search(row[1]))
-                has_values = bool(values_regex.search(row[1]))
-
-                if has_letters and not has_units and has_values:
+            for row, flags in zip(rows[date_idx + 1:], rows_flags[date_idx + 1:]):
+                has_letters = flags[0] & self.letters_flag
+                has_values = flags[1] & self.value_flag
+                if has_letters and has_values and not self.HasUnits(row[:2]):
                     break
                 else:
                     header_idx += 1
 
             header_rows, value_rows = rows[:header_idx + 1], rows[header_idx + 1:]
             if header_rows and value_rows:
-                header_idx = first_idx + header_idx
-                new_tables.append([header_idx, last_idx, header_rows, value_rows])
+                table.header_idx = table.first_idx + header_idx
+                table.header_rows, table.rows = header_rows, value_rows
+                table.cell_flags = table.cell_flags[header_idx + 1:]
+                new_tables.append(table)
 
         return new_tables
 
-    def MergeRows(self, rows, idx):
-
-        uppercase_regex = re.compile(r'^\s*[A-Z]')
-        colon_regex = re.compile(r':\s*$')
-        uppercase_ratio = lambda text: sum(1 if char.isupper() else 0 for char in text) / len(text) if len(text) else 0
+    def MergeRows(self, rows, rows_flags, idx):
 
-        previous_row = rows[idx - 1] if idx > 0 else None
-        current_row = rows[idx]
-        next_row = rows[idx + 1] if idx < len(rows) - 1 else None
+        if all(flags & self.empty_flag for flags in rows_flags[idx][1:]):
+            previous_label = rows[idx - 1][0] if idx > 0 else None
+            current_label = rows[idx][0]
+            next_label = rows[idx + 1][0] if idx < len(rows) - 1 else None
 
-        if all(not cell for cell in current_row[1:]):
-            next_row_not_capitalized = next_row is not None and not bool(uppercase_regex.search(next_row[0]))
-            current_row_not_capitalized = not bool(uppercase_regex.search(current_row[0]))
-            previous_row_hasno_colon = previous_row is not None and not bool(colon_regex.search(previous_row[0]))
+            next_row_not_capitalized = next_label is not None and not 'A' <= next_label.lstrip()[:1] <= 'Z'
+            current_row_not_capitalized = not 'A' <= current_label.lstrip()[:1] <= 'Z'
+            previous_row_hasno_colon = previous_label is not None and not previous_label.rstrip().endswith(':')
 
             if next_row_not_capitalized:
-                if uppercase_ratio(current_row[0]) < 0.5 and uppercase_ratio(next_row[0]) < 0.5:
-                    rows[idx + 1][0] = '%s %s' % (current_row[0], next_row[0])
+                if not self.IsUppercase(current_label) and not self.IsUppercase(next_label):
+                    rows[idx + 1][0] = '%s %s' % (rows[idx][0], rows[idx + 1][0])
+                    rows_flags[idx + 1] = (self.ClassifyCell(rows[idx + 1][0]),) + rows_flags[idx + 1][1:]
                     rows.pop(idx)
-                    return rows, True
+                    rows_flags.pop(idx)
+                    return rows, rows_flags, True
 
             elif current_row_not_capitalized and previous_row_hasno_colon:
-                if uppercase_ratio(previous_row[0]) < 0.5 and uppercase_ratio(current_row[0]) < 0.5:
-                    rows[idx - 1][0] = '%s %s' % (previous_row[0], current_row[0]) 
+                if not self.IsUppercase(previous_label) and not self.IsUppercase(current_label):
+                    rows[idx - 1][0] = '%s %s' % (rows[idx - 1][0], rows[idx][0])
+                    rows_flags[idx - 1] = (self.ClassifyCell(rows[idx - 1][0]),) + rows_flags[idx - 1][1:]
                     rows.pop(idx)
-                    return rows, True
+                    rows_flags.pop(idx)
+                    return rows, rows_flags, True
 
-        return rows, False
+        return rows, rows_flags, False
 
     def CleanRows(self, tables):
 
-        letters_regex = re.compile(r'[A-Za-z]')
-        row_valid = lambda row: bool(letters_regex.search(row[0])) and all(row[1:])
+        row_valid = lambda flags: flags[0] & self.letters_flag and not any(cell_flags & self.empty_flag for cell_flags in flags[1:])
         new_tables = []
-
         for table in tables:
-            header_idx, last_idx, header_rows, value_rows = table
-            idx = next((idx for idx, row in enumerate(value_rows[::-1]) if row_valid(row)), len(value_rows))
-            value_rows, idx = value_rows[:len(value_rows) - idx], 0
+            header_rows, value_rows, rows_flags = table.header_rows, table.rows, table.cell_flags
+            idx = next((idx for idx, flags in enumerate(rows_flags[::-1]) if row_valid(flags)), len(value_rows))
+            value_rows, rows_flags, idx = value_rows[:len(value_rows) - idx], rows_flags[:len(rows_flags) - idx], 0
             while idx < len(value_rows):
-                value_rows, was_merged = self.MergeRows(value_rows, idx)
+                value_rows, rows_flags, was_merged = self.MergeRows(value_rows, rows_flags, idx)
                 if not was_merged:
                     idx += 1
 
-            value_rows = [row for row in value_rows if row_valid(row)]
-            if value_rows:
+            valid_rows = [(row, flags) for row, flags in zip(value_rows, rows_flags) if row_valid(flags)]
+            if valid_rows:
                 header_columns = [list(dict.fromkeys(column)) for column in zip(*header_rows)]
                 header_row = [' '.join(column).strip() for column in header_columns]
-                rows = [header_row] + value_rows
-                new_tables.append([header_idx, last_idx, rows])
+                value_rows, rows_flags = [row for row, flags in valid_rows], [flags for row, flags in valid_rows]
+                table.header_rows, table.rows, table.cell_flags = [], [header_row] + value_rows, None
+                new_tables.append(table)
 
         return new_tables
 
     def ExtractTitle(self, lines, tables):
 
-        titles = []
         for idx, table in enumerate(tables):
-            header_idx, last_idx, rows = table
-            first_idx = tables[idx - 1][1] + 1 if idx > 0 else 0
-            lines_slice = lines[first_idx:header_idx + 1]
+            first_idx = tables[idx - 1].last_idx + 1 if idx > 0 else 0
+            lines_slice = lines[first_idx:table.header_idx + 1]
+            table.title = [line.GetText() for line in lines_slice]
 
-            title = []
-            for line in lines_slice:
-                words, separators = line
-                text = ' '.join(word[-1] for word in words)
-                title.append(text)
+        return tables
 
-            titles.append(title)
+    def ConvertYear(self, year):
 
-        for idx, table in enumerate(tables):
-            header_idx, last_idx, rows = table
-            tables[idx] = [titles[idx], rows]
+        this_year = datetime.now().year
+        year += this_year // 100 * 100
+        if year >= this_year + 50:
+            year -= 100
+        elif year < this_year - 50:
+            year += 100
 
-        return tables
+        return year
+
+    def ParseDate(self, text):
+
+        for order, regex in self.date_formats:
+            match = regex.fullmatch(text)
+            if match is None:
+                continue
+
+            groups, separators = match.groups(), set(re.findall(r'[\/.-]', text))
+            if order in ('ymd', 'mdy') and '.' in separators and len(separators) > 1:
+                break
+
+            if order == 'ymd':
+                year, month, day = [int(group) for group in groups]
+            elif order == 'mdy':
+                numbers = [int(group) for group in groups]
+                if numbers[0] > 31:
+                    year, month, day = numbers
+                elif numbers[0] > 12:
+                    day, month, year = numbers
+                else:
+                    month, day, year = numbers
+
+                if len(groups[-1]) == 2:
+                    year = self.ConvertYear(year)
+            else:
+                tokens = dict(zip(order, groups))
+                year, month, day = int(tokens['y']), self.months_map[tokens['b'].lower()], int(tokens['d'])
+
+            return datetime(year=year, month=month, day=day)
+
+        raise ValueError('Unknown date format: %s' % text)
 
     def ExtractDate(self, text):
 
+        key = ' '.join(text.split())
+        if key in self.date_cache:
+            self.date_cache.move_to_end(key)
+            return self.date_cache[key]
+
+        date = self.ParseHeaderDate(key)
+        self.date_cache[key] = date
+        if len(self.date_cache) > self.date_cache_size:
+            self.date_cache.popitem(last=False)
+
+        return date
+
+    def ParseHeaderDate(self, text):
+
         match, date = self.date_regex.search(text), None
         if match is not None:
             date = match.group()
@@ -592,7 +938,7 @@ class TableExtractor:
                         date -= timedelta(days=1)  
 
                     else:
-                        date = parser.parse(date, parserinfo=self.parser_info)
+                        date = self.ParseDate(date)
 
                 date = date.strftime('%Y-%m-%d')
             except:
@@ -620,21 +966,28 @@ class TableExtractor:
 
         return units, multiplier
 
-    def ParseNumber(self, text):
+    def ParseNumbers(self, column):
 
-        text = re.sub(r'\s+|\+', '', text)
-        text = re.sub(r'\([\d.,]+\)', lambda match: '-%s' % match.group()[1:-1], text)
-        text = re.sub(r'[,.](?=\d{3})', '', text)
-        text = text.replace(',', '.').strip()
+        text = '\x00'.join(column)
+        if text.count('\x00') != len(column) - 1:
+            text = '\x00'.join(cell.replace('\x00', '#') for cell in column)
 
-        try:
-            number = float(text)
-        except:
-            number = None
+        text = self.number_regexes[0].sub('', text)
+        text = self.number_regexes[1].sub(lambda match: '-%s' % match.group()[1:-1], text)
+        text = self.number_regexes[2].sub('', text)
+        text = text.replace(',', '.')
 
-        return number
+        values, mask = np.zeros(len(column), dtype=np.float64), np.zeros(len(column), dtype=bool)
+        for idx, cell in enumerate(text.split('\x00')):
+            if cell and cell != '-':
+                try:
+                    values[idx], mask[idx] = float(cell), True
+                except ValueError:
+                    pass
 
-    def FormatRows(self, page, title, rows):
+        return values, mask
+
+    def FormatRows(self, artifact, title, rows):
 
         keys, dates = rows[0][1:], []
         for idx, key in enumerate(keys):
@@ -646,62 +999,40 @@ class TableExtractor:
             return [], '', 1
        
         title = ' '.join(title[::-1])
-        keys = ' '.join(row[0] for row in rows[1:] if not re.search(r'(?:per|par)\s+(share|action)', row[0], re.IGNORECASE))
+        per_share_mask = np.array([bool(self.per_share_regex.search(row[0])) for row in rows[1:]], dtype=bool)
+        keys = ' '.join(row[0] for row, per_share in zip(rows[1:], per_share_mask) if not per_share)
         units_and_multipliers = [self.ExtractUnits(text) for text in (title, keys)]
         units_and_multipliers = sorted(units_and_multipliers, key=lambda item: (item[1], item[0]), reverse=True)
         units, multiplier = units_and_multipliers[0]
 
-        formatted_rows, html_data = [], page.get_text('html')
+        formatted_rows = []
         for idx, date in dates:
-            formatted_row, contain_values = OrderedDict(date=date, units=units), False
-            for row in rows[1:]:
-                key, value = row[0], row[idx]
-                value = self.ParseNumber(value)
-                if value is not None:
-                    contain_values = True
-                    if not re.search(r'(?:per|par)\s+(share|action)', key, re.IGNORECASE):
-                        value *= multiplier
-
-                formatted_row[key] = value
-
-            if contain_values:
-                formatted_row['html_data'] = html_data
+            values, mask = self.ParseNumbers([row[idx] for row in rows[1:]])
+            values = np.where(per_share_mask, values, values * multiplier).tolist()
+
+            formatted_row = OrderedDict(date=date, units=units)
+            for row, value, is_valid in zip(rows[1:], values, mask):
+                formatted_row[row[0]] = value if is_valid else None
+
+            if mask.any():
+                formatted_row['html_data'] = artifact
                 formatted_row['raw_data'] = rows
                 formatted_rows.append(formatted_row)
 
         return formatted_rows, units, multiplier
 
-    def FormatTables(self, page, lines, tables, most_common_units, most_common_multiplier):
+    def ExtractLineUnits(self, lines):
 
-        formatted_tables, unit_counts = [], {}
-        for title, rows in tables:
-            rows, units, multiplier = self.FormatRows(page, title, rows)
-            if rows:
-                formatted_table = OrderedDict(title=' '.join(title), body=rows)
-                formatted_tables.append(formatted_table)
-
-                if units:
-                    key = units, multiplier
-                    unit_counts[key] = unit_counts.get(key, 0) + 1
+        line_units = []
+        for line in lines:
+            text = line.GetText()
+            if not self.per_share_regex.search(text):
+                line_units.append(self.ExtractUnits(text))
 
-        tables = formatted_tables
-        if tables and not unit_counts:
-            for line in lines:
-                text = ' '.join(word[-1] for word in line[0])
-                if not re.search(r'(?:per|par)\s+(share|action)', text, re.IGNORECASE):
-                    units, multiplier = self.ExtractUnits(text)
-                    if units:
-                        key = units, multiplier
-                        unit_counts[key] = unit_counts.get(key, 0) + 1
-
-            if not unit_counts and most_common_units:
-                key = most_common_units, most_common_multiplier
-                unit_counts[key] = unit_counts.get(key, 0) + 1
+        return line_units
 
-        if not unit_counts:
-            return []
+    def ApplyUnits(self, tables, units, multiplier):
 
-        units, multiplier = max(unit_counts.keys(), key=lambda item: unit_counts[item])
         for table_idx, table in enumerate(tables):
             title, rows = table['title'], table['body']
             if rows[0]['units']:
@@ -710,7 +1041,7 @@ class TableExtractor:
             for row_idx, row in enumerate(rows):
                 row['units'] = units
                 for key, value in row.items():
-                    if isinstance(value, float) and not re.search(r'(?:per|par)\s+(share|action)', key, re.IGNORECASE):
+                    if isinstance(value, float) and not self.per_share_regex.search(key):
                         row[key] *= multiplier
 
                 rows[row_idx] = row
@@ -719,26 +1050,182 @@ class TableExtractor:
 
         return tables
 
+    def FormatTables(self, artifact, lines, tables):
+
+        formatted_tables, unit_counts = [], {}
+        for table in tables:
+            title, rows = table.title, table.rows
+            rows, units, multiplier = self.FormatRows(artifact, title, rows)
+            if rows:
+                formatted_table = OrderedDict(title=' '.join(title), body=rows)
+                formatted_tables.append(formatted_table)
+
+                if units:
+                    key = units, multiplier
+                    unit_counts[key] = unit_counts.get(key, 0) + 1
+
+        tables = formatted_tables
+        if tables and not unit_counts:
+            for key in self.ExtractLineUnits(lines):
+                if key[0]:
+                    unit_counts[key] = unit_counts.get(key, 0) + 1
+
+        if not unit_counts:
+            return tables, False
+
+        units, multiplier = max(unit_counts.keys(), key=lambda item: unit_counts[item])
+        tables = self.ApplyUnits(tables, units, multiplier)
+
+        return tables, True
+
+    def GetDocumentUnits(self, pages_units):
+
+        unit_counts = {}
+        for key in pages_units:
+            if key[0]:
+                unit_counts[key] = unit_counts.get(key, 0) + 1
+
+        if not unit_counts:
+            return '', 1
+
+        return max(unit_counts.keys(), key=lambda item: unit_counts[item])
+
+    def GetDocumentKey(self, document):
+
+        return self.text_layer_cache.GetDocumentKey(document) if self.text_layer_cache is not None else None
+
+    def GetTextLayer(self, page, document_key=None):
+
+        if document_key is not None:
+            text = self.text_layer_cache.LoadText(document_key, page.number)
+            words = self.text_layer_cache.LoadWords(document_key, page.number)
+            if text is not None and words is not None:
+                return text, words
+
+        textpage = page.get_textpage()
+        text, words = page.get_text(textpage=textpage), page.get_text('words', textpage=textpage)
+        if document_key is not None:
+            self.text_layer_cache.SaveText(document_key, page.number, text)
+            self.text_layer_cache.SaveWords(document_key, page.number, words)
+
+        return text, words
+
+    def GetRects(self, page, document_key=None):
+
+        if document_key is not None:
+            rects = self.text_layer_cache.LoadRects(document_key, page.number)
+            if rects is not None:
+                return rects
+
+        rects = self.ExtractRects(page)
+        if document_key is not None:
+            self.text_layer_cache.SaveRects(document_key, page.number, rects)
+
+        return rects
+
+    def ExtractPageTables(self, page, document_key=None, text_layer=None):
+
+        text, words = text_layer or self.GetTextLayer(page, document_key)
+        page_units = self.ExtractUnits(text)
+        if self.page_threshold and self.ScorePage(page, words) < self.page_threshold:
+            return page_units, None, True, 0
+
+        rects, clipped_words = None, 0
+        if self.clip_regions:
+            rects = self.GetRects(page, document_key)
+            words, clipped_words = self.ClipWords(page, words, rects)
+
+        lines = self.ExtractLines(page, words, rects, document_key)
+        tables = self.ExtractTables(lines)  
+        tables = self.FilterTables(tables)
+        tables = self.IdentifyHeader(tables)
+
+        tables = self.CleanRows(tables)
+        tables = self.ExtractTitle(lines, tables)
+        artifact = PageArtifact(page.parent, page.number, self.strip_images)
+        tables, has_units = self.FormatTables(artifact, lines, tables)
+
+        return page_units, tables, has_units, clipped_words
+
+    @staticmethod
+    def InitializeWorker(document, page_threshold, strip_images, clip_regions, cache_text):
+
+        TableExtractor.worker_extractor = TableExtractor(page_threshold=page_threshold, strip_images=strip_images,
+                                                         clip_regions=clip_regions, cache_text=cache_text)
+        TableExtractor.worker_document = fitz.open(stream=document, filetype='pdf')
+        TableExtractor.worker_document_key = TableExtractor.worker_extractor.GetDocumentKey(document)
+
+    @staticmethod
+    def ExtractWorkerTables(page_number):
+
+        page = TableExtractor.worker_document[page_number]
+        return TableExtractor.worker_extractor.ExtractPageTables(page, TableExtractor.worker_document_key)
+
+    def ExtractTablesParallel(self, document, page_count, workers):
+
+        initargs = (document, self.page_threshold, self.strip_images, self.clip_regions, self.text_layer_cache is not None)
+        with ProcessPoolExecutor(max_workers=workers, initializer=self.InitializeWorker, initargs=initargs) as executor:
+            pages_tables = list(executor.map(self.ExtractWorkerTables, range(page_count)))
+
+        return pages_tables
+
+    def AttachDocument(self, pages_tables, document):
+
+        for page_units, page_tables, has_units, clipped_words in pages_tables:
+            for table in page_tables or []:
+                for row in table['body']:
+                    row['html_data'].document = document
+
+        return pages_tables
+
     def __call__(self, document):
         
-        document = fitz.open(stream=document, filetype='pdf')
-        units_and_multipliers = [self.ExtractUnits(page.get_text()) for page in document]
-        units_and_multipliers = [item for item in units_and_multipliers if item[0]]
-        if units_and_multipliers:
-            units, multiplier = max(units_and_multipliers, key=lambda item: units_and_multipliers.count(item))
+        document = document.getvalue() if hasattr(document, 'getvalue') else document
+        pdf_document = fitz.open(stream=document, filetype='pdf')
+        workers = min(self.workers or 1, os.cpu_count() or 1)
+        if workers > 1 and len(pdf_document) >= self.min_parallel_pages:
+            pages_tables = self.ExtractTablesParallel(document, len(pdf_document), workers)
+            pages_tables = self.AttachDocument(pages_tables, pdf_document)
         else:
-            units, multiplier = '', 1
+            document_key = self.GetDocumentKey(document)
+            pages_tables = [self.ExtractPageTables(page, document_key) for page in pdf_document]
+
+        units, multiplier = self.GetDocumentUnits(page_units for page_units, page_tables, has_units, clipped_words in pages_tables)
+        tables, self.skipped_pages, self.clipped_words = [], 0, 0
+        for page_units, page_tables, has_units, clipped_words in pages_tables:
+            self.clipped_words += clipped_words
+            if page_tables is None:
+                self.skipped_pages += 1
+            elif has_units:
+                tables.extend(page_tables)
+            elif units:
+                tables.extend(self.ApplyUnits(page_tables, units, multiplier))
 
-        tables = []
-        for page in document:
-            lines = self.ExtractLines(page)
-            tables_slice = self.ExtractTables(lines)  
-            tables_slice = self.FilterTables(tables_slice)
-            tables_slice = self.IdentifyHeader(tables_slice)
-
-            tables_slice = self.CleanRows(tables_slice)
-            tables_slice = self.ExtractTitle(lines, tables_slice)
-            tables_slice = self.FormatTables(page, lines, tables_slice, units, multiplier)
-            tables.extend(tables_slice)
-
-        return tables
\ No newline at end of file
+        return tables
+
+    def Stream(self, document):
+
+        document = document.getvalue() if hasattr(document, 'getvalue') else document
+        pdf_document = fitz.open(stream=document, filetype='pdf')
+        document_key = self.GetDocumentKey(document)
+        pages_units, text_layers, document_units = [], {}, None
+        self.skipped_pages, self.clipped_words = 0, 0
+        for page in pdf_document:
+            text_layer = text_layers.pop(page.number, None)
+            page_units, page_tables, has_units, clipped_words = self.ExtractPageTables(page, document_key, text_layer)
+            pages_units.append(page_units)
+            self.clipped_words += clipped_words
+            if page_tables is not None and not has_units and document_units is None:
+                for idx in range(page.number + 1, len(pdf_document)):
+                    text_layers[idx] = self.GetTextLayer(pdf_document[idx], document_key)
+                    pages_units.append(self.ExtractUnits(text_layers[idx][0]))
+                document_units = self.GetDocumentUnits(pages_units)
+
+            if page_tables is None:
+                self.skipped_pages += 1
+            elif has_units:
+                yield page_tables
+            elif document_units[0]:
+                yield self.ApplyUnits(page_tables, *document_units)
+            else:
+                yield []
\ No newline at end of file
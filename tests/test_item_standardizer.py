@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import random
+import unittest
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_path)
+from item_standardizer import ItemStandardizer
+
+class LabelMappingTest(unittest.TestCase):
+
+    corpus_path = os.path.join(root_path, 'tests', 'data', 'label_mapping.json')
+    prefixes = ['', '', '', 'Total ', 'Consolidated ', 'Net ', 'Of which ', '- ', 'Group ']
+    suffixes = ['', '', '', ' (note 12)', ', net', ' attributable to owners of the parent', ' for the period', ' (restated)',
+                ' after tax', ' - continuing operations']
+
+    @classmethod
+    def setUpClass(cls):
+
+        os.chdir(root_path)
+        cls.item_standardizer = ItemStandardizer()
+        with open(cls.corpus_path, 'r', encoding='utf-8') as file:
+            cls.corpus = json.load(file)
+
+    @staticmethod
+    def MapItemsBaseline(item_standardizer, statement_name, keys):
+
+        items_map = OrderedDict()
+        for item, regex in item_standardizer.item_regexes[statement_name].items():
+            keys_and_ratios = []
+            for key in keys:
+                match = regex.search(key)
+                if match is not None:
+                    name = ' '.join(token for token in match.groups() if token)
+                    keys_and_ratios.append((key, SequenceMatcher(None, key.lower(), name.lower()).ratio()))
+
+            items_map[item] = max(keys_and_ratios, key=lambda item: item[1])[0] if keys_and_ratios else None
+
+        return items_map
+
+    @staticmethod
+    def CreateCorpus(item_standardizer, count=150, seed=0):
+
+        with open('data/structures.json', 'r', encoding='utf-8') as file:
+            structures = json.load(file)
+
+        names = {statement_name: sorted(set(name for names in structures[statement_name]['items'].values() for name in names))
+                 for statement_name in item_standardizer.statement_names}
+        all_names = sorted(set(name for statement_names in names.values() for name in statement_names))
+        random_generator, cases = random.Random(seed), []
+        for idx in range(count):
+            statement_name, labels = item_standardizer.statement_names[idx % 3], []
+            for label_idx in range(random_generator.randint(15, 45)):
+                name = random_generator.choice(names[statement_name] if random_generator.random() < 0.85 else all_names)
+                label = random_generator.choice(LabelMappingTest.prefixes) + name + random_generator.choice(LabelMappingTest.suffixes)
+                label = label[0].upper() + label[1:]
+                if label not in labels:
+                    labels.append(label)
+
+            items_map = item_standardizer.MapItems(statement_name, labels)
+            baseline_map = LabelMappingTest.MapItemsBaseline(item_standardizer, statement_name, labels)
+            label_index = lambda key: None if key is None else labels.index(key)
+            expected = OrderedDict((item, label_index(key)) for item, key in items_map.items() if key is not None)
+            changes = OrderedDict((item, label_index(baseline_map[item])) for item in items_map if baseline_map[item] != items_map[item])
+            cases.append(OrderedDict(statement_name=statement_name, labels=labels, expected=expected, baseline_changes=changes))
+
+        return cases
+
+    def GetExpectedMap(self, case, items, changes=None):
+
+        labels, expected = case['labels'], dict(case['expected'], **(changes or {}))
+        return dict((item, None if expected.get(item) is None else labels[expected[item]]) for item in items)
+
+    def testMappingMatchesCorpus(self):
+
+        for case in self.corpus:
+            items_map = self.item_standardizer.MapItems(case['statement_name'], case['labels'])
+            self.assertEqual(dict(items_map), self.GetExpectedMap(case, items_map), case['labels'])
+
+    def testBaselineDifferencesAreRecorded(self):
+
+        for case in self.corpus:
+            baseline_map = self.MapItemsBaseline(self.item_standardizer, case['statement_name'], case['labels'])
+            expected_map = self.GetExpectedMap(case, baseline_map, case['baseline_changes'])
+            self.assertEqual(dict(baseline_map), expected_map, case['labels'])
+
+    def testCachedMappingIsStable(self):
+
+        item_standardizer = ItemStandardizer()
+        for case in self.corpus[:20]:
+            first_map = item_standardizer.MapItems(case['statement_name'], case['labels'])
+            second_map = item_standardizer.MapItems(case['statement_name'], case['labels'])
+            self.assertEqual(first_map, second_map)
+
+if __name__ == '__main__':
+    if '--update' in sys.argv:
+        os.chdir(root_path)
+        cases = LabelMappingTest.CreateCorpus(ItemStandardizer())
+        os.makedirs(os.path.dirname(LabelMappingTest.corpus_path), exist_ok=True)
+        with open(LabelMappingTest.corpus_path, 'w', encoding='utf-8') as file:
+            file.write('[\n%s\n]\n' % ',\n'.join(json.dumps(case, ensure_ascii=False) for case in cases))
+        changed = sum(1 for case in cases if case['baseline_changes'])
+        print('Saved %d cases to %s, %d differ from the SequenceMatcher baseline' % (len(cases), LabelMappingTest.corpus_path, changed))
+    else:
+        unittest.main()
\ No newline at end of file
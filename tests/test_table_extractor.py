@@ -0,0 +1,155 @@
+import os
+import sys
+import json
+import random
+import unittest
+from datetime import datetime
+from collections import OrderedDict
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root_path)
+from table_extractor import TableExtractor
+from statement_generator import StatementGenerator
+
+try:
+    from dateutil import parser
+except ImportError:
+    parser = None
+
+class HeaderDateTest(unittest.TestCase):
+
+    corpus_path = os.path.join(root_path, 'tests', 'data', 'header_dates.json')
+    prefixes = ['', '', '', 'As at ', 'Year ended ', 'Period ended ', 'Au ', 'Exercice clos le ']
+    suffixes = ['', '', '', ' (restated)', ' audited', '*', ' retraité']
+    separators = [' ', '  ', ', ', ',', ' , ']
+    month_names = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September', 'October',
+                   'November', 'December', 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct',
+                   'Nov', 'Dec', 'Janvier', 'Février', 'Mars', 'Avril', 'Mai', 'Juin', 'Juillet', 'Aout', 'Septembre',
+                   'Octobre', 'Novembre', 'Décembre']
+    periods = ['H1', 'H2', 'S1', 'S2', 'Q1', 'Q2', 'Q3', 'Q4', '1er semestre', '2ème semestre', 'first half-year',
+               '2nd half year', 'second half-year']
+
+    @classmethod
+    def setUpClass(cls):
+
+        os.chdir(root_path)
+        cls.table_extractor = TableExtractor()
+        with open(cls.corpus_path, 'r', encoding='utf-8') as file:
+            cls.corpus = json.load(file)
+
+    @staticmethod
+    def CreateBaselineExtractor():
+
+        month_names = HeaderDateTest.month_names
+        class ParserInfo(parser.parserinfo):
+            MONTHS = list(zip(month_names[:12], month_names[12:24], month_names[24:]))
+
+        table_extractor, parser_info = TableExtractor(), ParserInfo()
+        table_extractor.ParseDate = lambda date: parser.parse(date, parserinfo=parser_info)
+        return table_extractor
+
+    @staticmethod
+    def CreateDate(random_generator):
+
+        year, month, day = random_generator.randint(2000, 2029), random_generator.randint(1, 12), random_generator.randint(1, 31)
+        month_name = random_generator.choice([name for idx, name in enumerate(HeaderDateTest.month_names) if idx % 12 == month - 1])
+        month_name = random_generator.choice([month_name, month_name.lower(), month_name.upper()])
+        first, second = random_generator.choice(HeaderDateTest.separators), random_generator.choice(HeaderDateTest.separators)
+        separator = random_generator.choice('/.-')
+        period = random_generator.choice(HeaderDateTest.periods)
+        dates = ['%02d%s%s%s%d' % (day, first, month_name, second, year), '%s%s%02d%s%d' % (month_name, first, day, second, year),
+                 '%s,%02d,%d' % (month_name, day, year), '%d%s%s%s%02d' % (year, first, month_name, second, day),
+                 '%d%s%02d%s%02d' % (year, separator, month, separator, day), '%d%s%d%s%d' % (day, separator, month, separator, year),
+                 '%02d%s%02d%s%d' % (month, separator, day, separator, year), '%d/%d/%02d' % (month, day, year % 100),
+                 '%s %d' % (period, year), '%d %s' % (year, period), '%d' % year, '%d%s%02d' % (year, separator, month),
+                 '%02d%s%d' % (month, separator, year)]
+
+        return random_generator.choice(dates)
+
+    @staticmethod
+    def CreateCorpus(table_extractor, count=3000, seed=0):
+
+        random_generator, texts = random.Random(seed), []
+        while len(texts) < count:
+            date = HeaderDateTest.CreateDate(random_generator)
+            text = random_generator.choice(HeaderDateTest.prefixes) + date + random_generator.choice(HeaderDateTest.suffixes)
+            if text not in texts:
+                texts.append(text)
+
+        baseline_extractor = HeaderDateTest.CreateBaselineExtractor() if parser is not None else None
+        cases = []
+        for text in texts:
+            date = table_extractor.ExtractDate(text)
+            baseline_date = baseline_extractor.ExtractDate(text) if baseline_extractor is not None else date
+            cases.append(OrderedDict(text=text, expected=date, dateutil_change=baseline_date != date))
+
+        return cases
+
+    def testDatesMatchCorpus(self):
+
+        for case in self.corpus:
+            self.assertEqual(self.table_extractor.ExtractDate(case['text']), case['expected'], case['text'])
+
+    def testCachedDatesAreStable(self):
+
+        table_extractor = TableExtractor()
+        table_extractor.date_cache_size = 16
+        for case in self.corpus[:200] + self.corpus[:200]:
+            self.assertEqual(table_extractor.ExtractDate(case['text']), case['expected'], case['text'])
+        self.assertEqual(len(table_extractor.date_cache), 16)
+
+    @unittest.skipIf(parser is None, 'dateutil is not installed')
+    def testDateutilDifferencesAreRecorded(self):
+
+        baseline_extractor, this_year = self.CreateBaselineExtractor(), str(datetime.now().year)
+        for case in self.corpus:
+            baseline_date = baseline_extractor.ExtractDate(case['text'])
+            if not case['dateutil_change']:
+                self.assertEqual(baseline_date, case['expected'], case['text'])
+                continue
+
+            self.assertRegex(case['text'], r'(?i)\b[a-zéû]+[\s,]+\d{2},20\d{2}\b')
+            self.assertEqual(baseline_date, this_year + case['expected'][4:], case['text'])
+
+class PageScoreTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+
+        os.chdir(root_path)
+
+    def AssertTablesKept(self, document):
+
+        table_extractor, baseline_extractor = TableExtractor(), TableExtractor(page_threshold=None)
+        tables, baseline_tables = table_extractor(document), baseline_extractor(document)
+        self.assertEqual([table['title'] for table in tables], [table['title'] for table in baseline_tables])
+        return table_extractor.skipped_pages
+
+    def testStatementPagesAreKept(self):
+
+        for seed in range(6):
+            self.AssertTablesKept(StatementGenerator(seed)(pages=6, columns=1 + seed % 3, narrative=0.3))
+
+    def testLowHeaderPagesAreKept(self):
+
+        for seed in range(6):
+            for header_y, rows in ((300, 3), (560, 3), (700, 5)):
+                document = StatementGenerator(seed)(pages=3, columns=1 + seed % 3, narrative=0, rows=rows, header_y=header_y)
+                self.assertEqual(self.AssertTablesKept(document), 0)
+
+    def testNarrativePagesAreSkipped(self):
+
+        document = StatementGenerator(0)(pages=6, narrative=1)
+        self.assertEqual(self.AssertTablesKept(document), 6)
+
+if __name__ == '__main__':
+    if '--update' in sys.argv:
+        os.chdir(root_path)
+        cases = HeaderDateTest.CreateCorpus(TableExtractor())
+        os.makedirs(os.path.dirname(HeaderDateTest.corpus_path), exist_ok=True)
+        with open(HeaderDateTest.corpus_path, 'w', encoding='utf-8') as file:
+            file.write('[\n%s\n]\n' % ',\n'.join(json.dumps(case, ensure_ascii=False) for case in cases))
+        changed = sum(1 for case in cases if case['dateutil_change'])
+        print('Saved %d cases to %s, %d differ from the dateutil baseline' % (len(cases), HeaderDateTest.corpus_path, changed))
+    else:
+        unittest.main()
\ No newline at end of file
@@ -0,0 +1,151 @@
+import os
+import fitz
+import shutil
+import hashlib
+import numpy as np
+
+class TextLayerCache:
+
+    def __init__(self, directory='cache', max_size=1 << 30):
+
+        self.root, self.directory = directory, os.path.join(directory, fitz.VersionBind)
+        self.max_size, self.used_documents = max_size, set()
+
+    def GetDocumentKey(self, document):
+
+        document = document.getvalue() if hasattr(document, 'getvalue') else document
+        return hashlib.sha256(document).hexdigest()
+
+    def GetDocumentPath(self, document_key):
+
+        return os.path.join(self.directory, document_key[:2], document_key)
+
+    def CreatePath(self, document_key, page_number, name):
+
+        file_name = '%d.%s.npy' % (page_number, name)
+        path = os.path.join(self.GetDocumentPath(document_key), file_name)
+        return path
+
+    def Touch(self, document_key):
+
+        if document_key in self.used_documents:
+            return
+
+        self.used_documents.add(document_key)
+        try:
+            os.utime(self.GetDocumentPath(document_key))
+        except OSError:
+            pass
+
+    def GetDocuments(self):
+
+        documents = []
+        for prefix in os.scandir(self.directory):
+            if not prefix.is_dir():
+                continue
+
+            for document in os.scandir(prefix.path):
+                try:
+                    size = sum(entry.stat().st_size for entry in os.scandir(document.path) if entry.is_file())
+                    documents.append((document.stat().st_mtime, size, document.name, document.path))
+                except OSError:
+                    pass
+
+        return documents
+
+    def Prune(self, keep=None):
+
+        for version in os.scandir(self.root):
+            if version.is_dir() and version.name != fitz.VersionBind:
+                shutil.rmtree(version.path, ignore_errors=True)
+
+        documents = sorted(self.GetDocuments())
+        size = sum(document[1] for document in documents)
+        for mtime, document_size, document_key, path in documents:
+            if size <= self.max_size:
+                break
+
+            if document_key != keep:
+                shutil.rmtree(path, ignore_errors=True)
+                self.used_documents.discard(document_key)
+                size -= document_size
+
+    def Clear(self):
+
+        shutil.rmtree(self.root, ignore_errors=True)
+        self.used_documents = set()
+
+    def Load(self, document_key, page_number, name):
+
+        path = self.CreatePath(document_key, page_number, name)
+        if not os.path.isfile(path):
+            return None
+
+        self.Touch(document_key)
+        try:
+            return np.load(path)
+        except (OSError, ValueError):
+            return None
+
+    def Save(self, document_key, page_number, name, array):
+
+        path = self.CreatePath(document_key, page_number, name)
+        is_new = not os.path.isdir(os.path.dirname(path))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = '%s.%d.tmp' % (path, os.getpid())
+        with open(temporary_path, 'wb') as file:
+            np.save(file, array)
+
+        os.replace(temporary_path, path)
+        if is_new:
+            self.Prune(keep=document_key)
+
+    def EncodeStrings(self, strings):
+
+        data = [string.encode('utf-8') for string in strings]
+        offsets = np.cumsum([0] + [len(item) for item in data], dtype=np.int64)
+        header = np.array([len(data)], dtype=np.int64)
+
+        return np.concatenate([header.view(np.uint8), offsets.view(np.uint8), np.frombuffer(b''.join(data), dtype=np.uint8)])
+
+    def DecodeStrings(self, array):
+
+        count = int(array[:8].view(np.int64)[0])
+        offsets = array[8:8 * (count + 2)].view(np.int64).tolist()
+        data = array[8 * (count + 2):].tobytes()
+
+        return [data[start:end].decode('utf-8') for start, end in zip(offsets, offsets[1:])]
+
+    def LoadText(self, document_key, page_number):
+
+        array = self.Load(document_key, page_number, 'text')
+        return None if array is None else array.tobytes().decode('utf-8')
+
+    def SaveText(self, document_key, page_number, text):
+
+        self.Save(document_key, page_number, 'text', np.frombuffer(text.encode('utf-8'), dtype=np.uint8))
+
+    def LoadWords(self, document_key, page_number):
+
+        boxes, texts = self.Load(document_key, page_number, 'boxes'), self.Load(document_key, page_number, 'words')
+        if boxes is None or texts is None:
+            return None
+
+        coordinates, indices = boxes[:, :4].tolist(), boxes[:, 4:].astype(np.int64).tolist()
+        return [(*box, text, *index) for box, text, index in zip(coordinates, self.DecodeStrings(texts), indices)]
+
+    def SaveWords(self, document_key, page_number, words):
+
+        boxes = np.array([word[:4] + word[5:] for word in words], dtype=np.float64).reshape(-1, 7)
+        self.Save(document_key, page_number, 'boxes', boxes)
+        self.Save(document_key, page_number, 'words', self.EncodeStrings(word[4] for word in words))
+
+    def LoadRects(self, document_key, page_number):
+
+        array = self.Load(document_key, page_number, 'rects')
+        return None if array is None else [fitz.Rect(rect) for rect in array.tolist()]
+
+    def SaveRects(self, document_key, page_number, rects):
+
+        rects = np.array([tuple(rect) for rect in rects], dtype=np.float64).reshape(-1, 4)
+        self.Save(document_key, page_number, 'rects', rects)
\ No newline at end of file